@@ -0,0 +1,263 @@
+"""SQLite advisory store: an alternative backend to re-globbing batch_data/ every run.
+
+patch_preprocessing.py --db advisories.db loads new or changed batch_data files into
+the store (see sync_store there) and then reads raw patches back with indexed queries
+by vendor, component and date range. Cleaned advisory text is indexed with FTS5 for
+ad-hoc lookups:
+
+    python advisory_store.py search mptcp --vendor Oracle
+"""
+import sys
+import json
+import sqlite3
+import argparse
+
+from patch_record import Patch, PATCH_FIELDS
+
+DEFAULT_DB = "advisories.db"
+# Bump when the tables change; an older store is dropped and rebuilt
+STORE_VERSION = "2"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    excluded_by TEXT
+);
+CREATE TABLE IF NOT EXISTS advisories (
+    rowid INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    original_id TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    dist_version TEXT,
+    date TEXT,
+    -- date as YYYY-MM-DD ("YYYY-MM" month dates map to the 1st) for range queries
+    date_key TEXT,
+    component TEXT,
+    specific_version TEXT,
+    summary TEXT,
+    diff_content TEXT,
+    full_text TEXT,
+    ref_url TEXT,
+    -- JSON list of the CVEs taken at ingest
+    cves TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_adv_source ON advisories(source_path, seq);
+CREATE INDEX IF NOT EXISTS idx_adv_vendor_comp_date ON advisories(vendor, component, date_key);
+CREATE INDEX IF NOT EXISTS idx_adv_date ON advisories(date_key);
+CREATE INDEX IF NOT EXISTS idx_adv_id ON advisories(id);
+"""
+
+# External-content FTS5 index over the cleaned text, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS advisory_fts USING fts5(
+    id UNINDEXED, component, full_text, content='advisories', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS advisories_ai AFTER INSERT ON advisories BEGIN
+    INSERT INTO advisory_fts(rowid, id, component, full_text) VALUES (new.rowid, new.id, new.component, new.full_text);
+END;
+CREATE TRIGGER IF NOT EXISTS advisories_ad AFTER DELETE ON advisories BEGIN
+    INSERT INTO advisory_fts(advisory_fts, rowid, id, component, full_text)
+    VALUES ('delete', old.rowid, old.id, old.component, old.full_text);
+END;
+"""
+
+
+def date_key(date):
+    """'2026-02-13' -> itself, '2026-02' -> '2026-02-01', anything else -> ''."""
+    if len(date) >= 10 and date[4] == '-' and date[7] == '-':
+        return date[:10]
+    if len(date) == 7 and date[4] == '-':
+        return date + "-01"
+    return ""
+
+
+def open_store(db_path, rules):
+    """Opens (creating if needed) the store. A different rules fingerprint empties it."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or row[0] != STORE_VERSION:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'files'").fetchone() is not None:
+            print("Advisory store has an older layout. Rebuilding.")
+        conn.executescript("""
+            DROP TABLE IF EXISTS advisory_fts;
+            DROP TABLE IF EXISTS advisories;
+            DROP TABLE IF EXISTS files;
+            DELETE FROM meta;
+        """)
+        with conn:
+            conn.execute("INSERT INTO meta(key, value) VALUES ('version', ?)", (STORE_VERSION,))
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: everything but full-text search still works
+        pass
+    row = conn.execute("SELECT value FROM meta WHERE key = 'rules'").fetchone()
+    if row is None or row[0] != rules:
+        if row is not None:
+            print("Advisory store built with different rules. Rebuilding.")
+        with conn:
+            conn.execute("DELETE FROM files")
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('rules', ?)", (rules,))
+    return conn
+
+
+def has_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'advisory_fts'").fetchone() is not None
+
+
+def file_entries(conn):
+    """{path: {'size', 'mtime_ns', 'sha256', 'excluded_by'}} for every stored file."""
+    return {
+        path: {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256, 'excluded_by': excluded_by}
+        for path, size, mtime_ns, sha256, excluded_by
+        in conn.execute("SELECT path, size, mtime_ns, sha256, excluded_by FROM files")
+    }
+
+
+def touch_file(conn, path, stat_entry):
+    """Updates size/mtime of a file whose content hash did not change."""
+    conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                 (stat_entry['size'], stat_entry['mtime_ns'], path))
+
+
+def put_file(conn, path, stat_entry, records, excluded_by=None):
+    """Replaces everything stored for path with its new records."""
+    conn.execute("DELETE FROM files WHERE path = ?", (path,))
+    conn.execute("INSERT INTO files(path, size, mtime_ns, sha256, excluded_by) VALUES (?, ?, ?, ?, ?)",
+                 (path, stat_entry['size'], stat_entry['mtime_ns'], stat_entry['sha256'], excluded_by))
+    conn.executemany(
+        f"INSERT INTO advisories(source_path, seq, date_key, cves, {', '.join(PATCH_FIELDS)}) "
+        f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in PATCH_FIELDS)})",
+        [(path, seq, date_key(p.date), None if p.cves is None else json.dumps(p.cves))
+         + tuple(getattr(p, f) for f in PATCH_FIELDS)
+         for seq, p in enumerate(records)],
+    )
+
+
+def remove_files(conn, paths):
+    conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+
+
+def query_patches(conn, vendors=None, components=None, since=None, until=None, lazy_text=False):
+    """Yields stored Patch records, optionally filtered, in batch_data file order.
+
+    since is inclusive and until exclusive (YYYY-MM-DD), like batch_collector.js.
+    With lazy_text, full_text is not read; records load it through Patch.text_loader
+    (see TextLoader below) when they need it.
+    """
+    where, params = [], []
+    if vendors:
+        where.append(f"vendor IN ({', '.join('?' for _ in vendors)})")
+        params.extend(vendors)
+    if components:
+        where.append(f"component IN ({', '.join('?' for _ in components)})")
+        params.extend(components)
+    if since:
+        where.append("date_key >= ?")
+        params.append(since)
+    if until:
+        where.append("date_key < ?")
+        params.append(until)
+    columns = [("NULL" if lazy_text and f == 'full_text' else f) for f in PATCH_FIELDS]
+    sql = f"SELECT {', '.join(columns)}, cves, source_path FROM advisories"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY source_path, seq"
+    for row in conn.execute(sql, params):
+        patch = Patch(*row[:-2], source=row[-1])
+        if row[-2] is not None:
+            patch.cves = json.loads(row[-2])
+        yield patch
+
+
+class TextLoader:
+    """A Patch.text_loader reading the full_text stored for a source path, else fallback(path).
+
+    Every record of one batch_data file carries the same text, so the first row is used.
+    The connection is opened on the first load; close() releases it.
+    """
+    def __init__(self, db_path, fallback):
+        self.db_path = db_path
+        self.fallback = fallback
+        self.conn = None
+
+    def __call__(self, source_path):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+        row = self.conn.execute("SELECT full_text FROM advisories WHERE source_path = ? ORDER BY seq LIMIT 1",
+                                (source_path,)).fetchone()
+        return row[0] if row is not None and row[0] is not None else self.fallback(source_path)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def exclusion_counts(conn):
+    """{rule: advisories dropped at ingest} for the stored files."""
+    return dict(conn.execute(
+        "SELECT excluded_by, COUNT(*) FROM files WHERE excluded_by IS NOT NULL GROUP BY excluded_by"))
+
+
+def search(conn, query, vendors=None, limit=50):
+    """Full-text search. Returns (id, vendor, component, date, snippet) rows, best match first."""
+    vendor_sql, params = "", [query]
+    if vendors:
+        vendor_sql = f" AND a.vendor IN ({', '.join('?' for _ in vendors)})"
+        params.extend(vendors)
+    params.append(limit)
+    if has_fts(conn):
+        sql = ("SELECT a.id, a.vendor, a.component, a.date, "
+               "snippet(advisory_fts, 2, '[', ']', '...', 12) "
+               "FROM advisory_fts JOIN advisories a ON a.rowid = advisory_fts.rowid "
+               f"WHERE advisory_fts MATCH ?{vendor_sql} ORDER BY rank LIMIT ?")
+    else:
+        params[0] = f"%{query}%"
+        sql = ("SELECT a.id, a.vendor, a.component, a.date, substr(a.full_text, 1, 80) "
+               f"FROM advisories a WHERE a.full_text LIKE ?{vendor_sql} ORDER BY a.date_key DESC LIMIT ?")
+    return conn.execute(sql, params).fetchall()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the SQLite advisory store.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Store file (default: {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_search = sub.add_parser("search", help="Full-text search over cleaned advisory text")
+    p_search.add_argument("query", help="FTS5 query, e.g. mptcp or '\"use after free\" AND tipc'")
+    p_search.add_argument("--vendor", action="append", help="Restrict to vendor (repeatable)")
+    p_search.add_argument("--limit", type=int, default=50)
+    sub.add_parser("stats", help="Row counts per vendor and ingest exclusion counts")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    conn = sqlite3.connect(args.db)
+    if args.command == "search":
+        try:
+            rows = search(conn, args.query, args.vendor, args.limit)
+        except sqlite3.OperationalError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        for adv_id, vendor, component, date, snippet in rows:
+            print(f"{adv_id:<28} {vendor:<8} {component:<24} {date:<10} {snippet}")
+        print(f"{len(rows)} match(es).")
+    elif args.command == "stats":
+        for vendor, n in conn.execute("SELECT vendor, COUNT(*) FROM advisories GROUP BY vendor ORDER BY vendor"):
+            print(f"{vendor:<10} {n}")
+        for rule, n in sorted(exclusion_counts(conn).items()):
+            print(f"excluded:{rule:<24} {n}")
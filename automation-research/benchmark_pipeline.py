@@ -0,0 +1,135 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+import patch_preprocessing as pre
+import perform_actual_review as review
+from synthetic_corpus import generate_corpus
+
+# NOTE: Stage-by-stage benchmark of the PRB pipeline. Each stage calls the same
+# functions the scripts use, on a synthetic corpus (synthetic_corpus.py) or a real
+# batch_data/ directory:
+#   ingest -> prune -> aggregate -> packet -> score -> csv
+# Timings are the best of --repeat runs; peak memory comes from one extra run under
+# tracemalloc (Python allocations in this process only, so --workers > 1 ingest
+# memory is not included).
+
+STAGES = ["ingest", "prune", "aggregate", "packet", "score", "csv"]
+
+
+def run_pipeline(json_files, workers, work_dir, on_stage):
+    """Runs every stage once. on_stage(name, items_in) must return a context manager."""
+    with on_stage("ingest", len(json_files)):
+        raw_list = []
+        for _, records, error, _ in pre.ingest_all(json_files, workers):
+            if error is None:
+                raw_list.extend(records)
+
+    with on_stage("prune", len(raw_list)):
+        pruned_list = pre.prune_patches(raw_list)
+
+    with on_stage("aggregate", len(pruned_list)):
+        grouped = pre.group_patches(pruned_list)
+        candidates = list(pre.iter_review_candidates(grouped, pre.build_cve_index(grouped)))
+
+    packet_file = os.path.join(work_dir, "packet.jsonl")
+    with on_stage("packet", len(candidates)):
+        pre.write_packet(iter(candidates), packet_file, "jsonl")
+
+    with on_stage("score", len(candidates)):
+        # review_item() logs every decision; keep that out of the measurement
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = [row for row in map(review.review_item, candidates) if row is not None]
+
+    with on_stage("csv", len(rows)):
+        review.write_report(rows, os.path.join(work_dir, "report.csv"))
+
+
+def benchmark(json_files, workers=1, repeat=3, memory=True):
+    """Returns {stage: {"seconds", "items", "items_per_sec", "peak_mb"}}."""
+    results = {name: {"seconds": None, "items": 0, "items_per_sec": 0.0, "peak_mb": None} for name in STAGES}
+
+    @contextlib.contextmanager
+    def timed(name, items):
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        res = results[name]
+        res["items"] = items
+        if res["seconds"] is None or elapsed < res["seconds"]:
+            res["seconds"] = elapsed
+            res["items_per_sec"] = items / elapsed if elapsed > 0 else 0.0
+
+    @contextlib.contextmanager
+    def traced(name, items):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        yield
+        results[name]["peak_mb"] = (tracemalloc.get_traced_memory()[1] - base) / (1024 * 1024)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for _ in range(repeat):
+            run_pipeline(json_files, workers, work_dir, timed)
+        if memory:
+            tracemalloc.start()
+            try:
+                run_pipeline(json_files, workers, work_dir, traced)
+            finally:
+                tracemalloc.stop()
+    return results
+
+
+def print_results(results, file_count):
+    print(f"\n{'Stage':<10} {'Items':>9} {'Seconds':>9} {'Items/s':>11} {'Peak MB':>9}")
+    for name in STAGES:
+        res = results[name]
+        peak = f"{res['peak_mb']:.1f}" if res["peak_mb"] is not None else "-"
+        print(f"{name:<10} {res['items']:>9} {res['seconds']:>9.3f} {res['items_per_sec']:>11.1f} {peak:>9}")
+    total = sum(res["seconds"] for res in results.values())
+    print(f"{'total':<10} {file_count:>9} {total:>9.3f} {file_count / total if total else 0:>11.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the PRB preprocessing/review pipeline.")
+    parser.add_argument("--data", help="Existing batch_data-style directory to benchmark")
+    parser.add_argument("--count", type=int, default=1000,
+                        help="Synthetic corpus size when --data is not given (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic corpus seed (default: 0)")
+    parser.add_argument("--workers", type=int, default=1, help="Ingest processes (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; best is reported (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    data_dir = args.data
+    if not data_dir:
+        # Generated corpora are reused across runs with the same size and seed
+        data_dir = f"bench_data_{args.count}_{args.seed}"
+        if not os.path.isdir(data_dir):
+            print(f"Generating {args.count} synthetic advisories into {data_dir}...")
+            generate_corpus(data_dir, args.count, args.seed)
+    json_files = sorted(glob.glob(os.path.join(data_dir, "*.json")))
+    if not json_files:
+        print(f"Error: no JSON files in {data_dir}")
+        sys.exit(1)
+
+    print(f"Benchmarking {len(json_files)} advisories from {data_dir} "
+          f"(workers={args.workers}, repeat={args.repeat})")
+    results = benchmark(json_files, max(1, args.workers), max(1, args.repeat), not args.no_memory)
+    print_results(results, len(json_files))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"data": data_dir, "files": len(json_files), "workers": args.workers,
+                       "stages": results}, f, indent=2)
+        print(f"Saved results to {args.json}")
@@ -0,0 +1,218 @@
+"""Local index of patches the review board already rejected, applied while pruning.
+
+patch_preprocessing.py --exclusions exclusion_index.json drops (or, with
+--mark-exclusions, marks) every patch the index knows before the packet is built,
+so rejected items stop coming back quarter after quarter. A patch is known when
+one of these matches a rejected patch:
+
+    id        its advisory ID (the dist-version split ID or the original ID)
+    package   (vendor, component, specific version)
+    cves      (vendor, exact set of CVEs it fixes)
+
+The file is one compact JSON object holding a {key: [source ID, reason]} map per
+kind, loaded straight into dicts for constant-time lookups. Update it from the
+reviewed final report, from reviewer decisions or from a list of rejected IDs:
+
+    python exclusion_index.py import-csv reviewed_report.csv --packet patches_for_llm_review.json
+    python exclusion_index.py import-decisions decisions.json --packet patches_for_llm_review.json
+    python exclusion_index.py import-ids rejected.txt --packet patches_for_llm_review.json
+    python exclusion_index.py add RHSA-2026:1234 --reason "not deployed"
+    python exclusion_index.py remove RHSA-2026:1234
+
+perform_actual_review.py writes every row as Critical, so an unedited report
+rejects nothing: add a Decision column (reject, exclude, not applicable, ...;
+see REJECT_DECISIONS) or change Criticality on the rows the board rejected.
+rejected.txt holds one advisory ID per line, optionally followed by a reason;
+blank lines and lines starting with # are skipped.
+"""
+import os
+import csv
+import sys
+import json
+import argparse
+
+from patch_record import extract_cves
+
+DEFAULT_INDEX = "exclusion_index.json"
+KINDS = ('id', 'package', 'cves')
+# Reviewer decisions (case-insensitive) that reject a patch
+REJECT_DECISIONS = {"exclude", "excluded", "reject", "rejected", "not applicable", "n/a", "skip"}
+
+
+def package_key(vendor, component, version):
+    """None without a version: a bare component would exclude every future update of it."""
+    return f"{vendor}|{component}|{version}" if version else None
+
+
+def cves_key(vendor, cves):
+    return f"{vendor}|{','.join(sorted(set(cves)))}" if cves else None
+
+
+class ExclusionIndex:
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = path
+        self.maps = {kind: {} for kind in KINDS}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        for kind in KINDS:
+            self.maps[kind] = data.get(kind, {})
+
+    def __len__(self):
+        return len(self.maps['id'])
+
+    def add(self, advisory_id, reason="", vendor=None, component=None, version=None, cves=None):
+        """Records a rejected patch under every key it has."""
+        value = [advisory_id, reason]
+        self.maps['id'][advisory_id] = value
+        if vendor:
+            for kind, key in (('package', package_key(vendor, component, version)), ('cves', cves_key(vendor, cves))):
+                if key:
+                    self.maps[kind][key] = value
+
+    def remove(self, advisory_id):
+        """Forgets advisory_id and every key recorded from it. Returns how many keys were dropped."""
+        removed = 0
+        for entries in self.maps.values():
+            for key in [key for key, (source, _) in entries.items() if source == advisory_id]:
+                del entries[key]
+                removed += 1
+        return removed
+
+    def match(self, patch):
+        """{'match', 'id', 'reason'} for the first index entry patch matches, or None."""
+        ids = self.maps['id']
+        for advisory_id in (patch.id, patch.original_id):
+            if advisory_id in ids:
+                return self._hit('id', ids[advisory_id])
+        key = package_key(patch.vendor, patch.component, patch.specific_version)
+        if key in self.maps['package']:
+            return self._hit('package', self.maps['package'][key])
+        if self.maps['cves']:
+            if patch.cves is None:
+                patch.cves = extract_cves(patch.diff_content, patch.full_text)
+            key = cves_key(patch.vendor, patch.cves)
+            if key in self.maps['cves']:
+                return self._hit('cves', self.maps['cves'][key])
+        return None
+
+    @staticmethod
+    def _hit(kind, value):
+        return {'match': kind, 'id': value[0], 'reason': value[1]}
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.maps, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+
+def packet_patches(packet_path):
+    """{advisory ID: (vendor, component, specific_version, cves)} for leads and history entries of a packet."""
+    from perform_actual_review import iter_packet
+    found = {}
+    for item in iter_packet(packet_path):
+        found[item['id']] = (item['vendor'], item['component'], item['specific_version'], item.get('cves'))
+        for hist in item.get('history', []):
+            # History entries share the lead's group (vendor, component) but not its version
+            found.setdefault(hist['id'], (item['vendor'], item['component'], None, hist.get('cves')))
+    return found
+
+
+def is_rejected(decision):
+    return (decision or "").strip().lower() in REJECT_DECISIONS
+
+
+def import_rows(index, rows, known=None):
+    """Adds every rejected row ({'id', 'decision', 'reason', 'vendor', 'component', 'version'}). Returns the count."""
+    known = known or {}
+    added = 0
+    for row in rows:
+        if not is_rejected(row.get('decision')):
+            continue
+        vendor, component, version, cves = known.get(row['id'], (None, None, None, None))
+        index.add(row['id'], row.get('reason') or row.get('decision'),
+                  row.get('vendor') or vendor, row.get('component') or component,
+                  row.get('version') or version, row.get('cves') or cves)
+        added += 1
+    return added
+
+
+def csv_rows(csv_path):
+    """Reviewed final report rows. A row is rejected by its Decision column, or a Criticality other than Critical."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            decision = row.get("Decision")
+            if not decision and row.get("Criticality", "Critical").strip().lower() != "critical":
+                decision = "rejected"
+            yield {'id': row["Issue ID"], 'decision': decision, 'reason': row.get("Reason") or row.get("Criticality"),
+                   'vendor': row.get("Vendor"), 'component': row.get("Component"), 'version': row.get("Version")}
+
+
+def id_rows(path):
+    """Rejected rows of a text file with one advisory ID (and optional reason) per line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            advisory_id, _, reason = line.partition(" ")
+            yield {'id': advisory_id, 'decision': "rejected", 'reason': reason.strip()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the index of rejected patches used by patch_preprocessing.py.")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help=f"Index file (default: {DEFAULT_INDEX})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_csv = sub.add_parser("import-csv", help="Add the rejected rows of a reviewed final report CSV")
+    p_csv.add_argument("csv_path")
+    p_csv.add_argument("--packet", help="Review packet to take CVE sets (and history versions) from")
+    p_dec = sub.add_parser("import-decisions",
+                           help="Add rejections from a JSON list of {id, decision, reason?, vendor?, component?, version?}")
+    p_dec.add_argument("json_path")
+    p_dec.add_argument("--packet", help="Review packet to take vendor, component, version and CVEs from")
+    p_ids = sub.add_parser("import-ids", help="Reject every advisory ID listed in a text file (ID [reason] per line)")
+    p_ids.add_argument("ids_path")
+    p_ids.add_argument("--packet", help="Review packet to take vendor, component, version and CVEs from")
+    p_add = sub.add_parser("add", help="Reject one advisory ID")
+    p_add.add_argument("advisory_id")
+    p_add.add_argument("--reason", default="")
+    p_add.add_argument("--packet", help="Review packet to take vendor, component, version and CVEs from")
+    p_rm = sub.add_parser("remove", help="Forget an advisory ID and every key recorded from it")
+    p_rm.add_argument("advisory_id")
+    sub.add_parser("stats", help="Number of keys per kind")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = ExclusionIndex(args.index)
+    known = packet_patches(args.packet) if getattr(args, 'packet', None) else {}
+    if args.command == "import-csv":
+        added = import_rows(index, csv_rows(args.csv_path), known)
+        if not added:
+            print(f"Warning: no rejected rows in {args.csv_path}. Every row reads as Critical; add a Decision "
+                  f"column (e.g. \"reject\") or change Criticality on the rejected rows, or use import-ids.")
+    elif args.command == "import-decisions":
+        with open(args.json_path, 'r', encoding='utf-8') as f:
+            added = import_rows(index, json.load(f), known)
+    elif args.command == "import-ids":
+        added = import_rows(index, id_rows(args.ids_path), known)
+    elif args.command == "add":
+        added = import_rows(index, [{'id': args.advisory_id, 'decision': "rejected", 'reason': args.reason}], known)
+    elif args.command == "remove":
+        removed = index.remove(args.advisory_id)
+        if not removed:
+            print(f"{args.advisory_id} is not in {args.index}.")
+            sys.exit(1)
+        index.save()
+        print(f"Removed {removed} key(s) recorded from {args.advisory_id}.")
+        sys.exit(0)
+    else:
+        for kind in KINDS:
+            print(f"{kind:<8} {len(index.maps[kind])}")
+        sys.exit(0)
+    index.save()
+    print(f"Added {added} rejected patch(es); {len(index)} in {args.index}.")
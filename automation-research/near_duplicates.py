@@ -0,0 +1,94 @@
+"""Near-duplicate clustering of the patches in a group (patch_preprocessing.py --cluster-near-duplicates).
+
+EUS/AUS variants of one Red Hat fix, the same kernel or glibc fix for several RHEL
+minors, and Ubuntu rows split per release land in one (vendor, component) group
+as separate history entries with nearly the same diff_content. Each text is cut
+into word shingles (version strings masked, so only the version table differs),
+summarized by a MinHash signature, and LSH banding proposes candidate pairs without
+comparing every pair. A pair is kept when its estimated Jaccard similarity reaches
+the threshold.
+"""
+import re
+import random
+import hashlib
+
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+# NUM_PERM = BANDS * ROWS; pairs above ~(1/BANDS)**(1/ROWS) = 0.5 similarity share a band
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.85
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250)
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+WORD_PATTERN = re.compile(r"[a-z0-9_]+(?:[.:~+\-][a-z0-9_]+)*")
+# 5.14.0-427.13.1.el9_4 / 2.35-0ubuntu3.8: the part that differs between otherwise identical advisories
+VERSION_WORD = re.compile(r"\d+(?:[.:~+\-]\w+)+")
+
+
+def shingles(text, k=SHINGLE_WORDS):
+    """Set of 64-bit hashes of the k-word shingles of text (lowercased, versions masked)."""
+    words = ["#" if VERSION_WORD.fullmatch(w) else w for w in WORD_PATTERN.findall(text.lower())]
+    if not words:
+        return set()
+    grams = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+    return {int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little') for g in grams}
+
+
+def signature(hashes):
+    """MinHash signature of a non-empty shingle hash set."""
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def cluster(items, threshold=THRESHOLD):
+    """Clusters [(key, scope, text)] and returns [[(key, similarity to the first key)], ...].
+
+    Only items of the same scope (e.g. vendor) are clustered; items with an empty text
+    never are. Clusters list members in input order, the first being the representative,
+    and singletons are left out.
+    """
+    sigs = {}
+    buckets = {}
+    for key, scope, text in items:
+        hashes = shingles(text)
+        if not hashes:
+            continue
+        sigs[key] = signature(hashes)
+        for band in range(BANDS):
+            buckets.setdefault((scope, band, sigs[key][band * ROWS:(band + 1) * ROWS]), []).append(key)
+
+    order = {key: i for i, key in enumerate(sigs)}
+    parent = {key: key for key in sigs}
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    checked = set()
+    for keys in buckets.values():
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                if (a, b) in checked:
+                    continue
+                checked.add((a, b))
+                if similarity(sigs[a], sigs[b]) >= threshold:
+                    ra, rb = find(a), find(b)
+                    if ra != rb:
+                        # The earliest item stays the root, so it represents the cluster
+                        if order[rb] < order[ra]:
+                            ra, rb = rb, ra
+                        parent[rb] = ra
+
+    clusters = {}
+    for key in sigs:
+        clusters.setdefault(find(key), []).append(key)
+    return [[(key, 1.0 if key == root else similarity(sigs[root], sigs[key])) for key in members]
+            for root, members in clusters.items() if len(members) > 1]
@@ -2,8 +2,23 @@ import re
 import csv
 import os
 import json
-from datetime import datetime
+from datetime import date, timedelta
 import glob
+import sys
+import argparse
+import hashlib
+import time
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from patch_record import Patch, HistoryEntry, ChangelogEntry, CVE_PATTERN, extract_cves
+from perform_actual_review import is_critical, lead_texts, review_rules_fingerprints
+from review_cache import ReviewCache
+from exclusion_index import ExclusionIndex
+from run_report import RunReport
+import advisory_store
+import report_delta
+import near_duplicates
 
 # NOTE: This script replaces 'perform_llm_review_simulation.py'. 
 # It does NOT perform the review. It performs the mechanical PRE-PROCESSING 
@@ -11,6 +26,31 @@ import glob
 
 JSON_DIR = r"batch_data"
 OUTPUT_FILE = "patches_for_llm_review.json"
+# Text fields written once to the packet's shared "texts" table (--shared-texts)
+SHARED_TEXT_FIELDS = ("full_text", "diff_content", "summary", "diff_summary")
+# Shorter strings are cheaper inline than as a reference
+SHARED_TEXT_MIN_LEN = 256
+# Per-advisory ingest results from previous runs (see load_ingest_cache)
+INGEST_CACHE_FILE = "ingest_cache.json"
+# Written into batch_data/ by batch_collector.js; not an advisory
+COLLECTION_FAILURES_FILE = "collection_failures.json"
+# --watch polling interval; a file counts as completely written once its size and
+# mtime are unchanged over one full interval
+WATCH_POLL_SECONDS = 5
+# History entries carry at most this much of each older patch's diff
+HISTORY_SUMMARY_CHARS = 800
+# --token-budget halves the history allowance of an oversized candidate down to this
+HISTORY_MIN_CHARS = 100
+# Conservative token estimate: ~3 UTF-8 bytes per token covers English text (~4
+# chars/token) as well as the CJK text of Red Hat portal pages (~1 char/token)
+BYTES_PER_TOKEN = 3
+# Per-directory sidecar with each advisory's id, vendor and collector date, so
+# out-of-window files are skipped without parsing them (hidden: not globbed as *.json)
+METADATA_INDEX_FILE = ".metadata_index.json"
+# Bump when ingest_advisory() output changes for reasons not captured by the rule tables
+INGEST_CACHE_VERSION = 6
+# Lookback of parseDateRange() in batch_collector.js when neither --quarter nor --days is given
+DEFAULT_LOOKBACK_DAYS = 90
 
 # --- CONFIGURATION: PRUNING RULES ---
 # STRICT WHITELIST: ONLY components capable of causing "System Critical" failures.
@@ -59,27 +99,103 @@ EXCLUDED_PACKAGES_EXPLICIT = [
     "compiz", "alsa", "sound"
 ]
 
+# Whole-word matcher over SYSTEM_CORE_COMPONENTS, built once at import.
+# The lookahead keeps matches zero-width so overlapping hits ("qemu-kvm" / "kvm")
+# are all visited in a single scan; alternatives are in list order, so the first
+# alternative reported at a position is the highest-priority one there.
+CORE_COMPONENT_PATTERN = re.compile(
+    r"(?=\b(" + "|".join(re.escape(core) for core in SYSTEM_CORE_COMPONENTS) + r")\b)"
+)
+CORE_COMPONENT_RANK = {core: i for i, core in enumerate(SYSTEM_CORE_COMPONENTS)}
+
+# --- CONFIGURATION: FILTER RULE TABLES ---
+# Each rule is (name, action, vendors, conditions): it fires when the advisory's
+# vendor is in vendors (None = any vendor) and every (field, op, value) condition
+# holds; the first rule that fires decides. Fields are those of AdvisoryView
+# (*_lower fields are lowercased once per advisory). Ops: "contains" / "lacks"
+# (substring), "matches" (regex search), "equals", "shorter_than" (length).
+_CORE_ALTERNATION = "|".join(re.escape(core) for core in SYSTEM_CORE_COMPONENTS)
+_EXPLICIT_ALTERNATION = "|".join(re.escape(bad) for bad in EXCLUDED_PACKAGES_EXPLICIT)
+
+# Ingest filters (exclusion_rule): advisories dropped before parsing further
+EXCLUSION_RULES = [
+    # 1. Garbage Data (Empty Content or Known Bad ID); OpenShift product advisories (not RHEL core)
+    ("openshift", "exclude", None, [("title_lower", "contains", "openshift")]),
+    ("openshift", "exclude", None, [("summary_lower", "contains", "openshift")]),
+    ("extended_lifecycle", "exclude", None, [("title_lower", "contains", "extended lifecycle")]),
+    ("extended_lifecycle", "exclude", None, [("summary_lower", "contains", "extended lifecycle")]),
+    ("extended_lifecycle", "exclude", None, [("text_head_lower", "contains", "extended lifecycle")]),
+    ("rhel7", "exclude", ["Red Hat"], [("title_lower", "contains", "rhel 7")]),
+    ("garbage", "exclude", ["Red Hat"], [("text", "shorter_than", 50)]),
+    ("garbage", "exclude", None, [("id", "equals", "RHSA-2026:2664")]),
+    # 2. Ubuntu Variant Exclusions: patches for the base x86_64 kernel always list the
+    # "linux - Linux kernel" package; variant-only ones (AWS, GCP, NVIDIA, FIPS, ...) do not
+    ("ubuntu_variant_kernel", "exclude", ["Ubuntu"],
+     [("title_lower", "contains", "kernel"), ("text_lower", "lacks", "linux - linux kernel")]),
+    # 3. User Blacklist (SAP, kernel-rt)
+    ("sap", "exclude", None, [("title", "contains", "SAP")]),
+    ("sap", "exclude", None, [("summary", "contains", "Update Services for SAP")]),
+    ("kernel_rt", "exclude", None, [("title_lower", "contains", "real time")]),
+    ("kernel_rt", "exclude", None, [("title_lower", "contains", "kernel-rt")]),
+    ("kernel_rt", "exclude", None, [("summary_lower", "contains", "kernel-rt")]),
+]
+
+# Pruning (prune_rule): which parsed patches are system critical
+PRUNE_RULES = [
+    # Rule 1: Oracle UEK Only
+    ("oracle_uek", "keep", ["Oracle"], [("component_lower", "contains", "kernel-uek")]),
+    ("oracle_non_uek", "exclude", ["Oracle"], []),
+    # Rule 2: Strict Whitelist (RHEL/Ubuntu)
+    ("explicit_blacklist", "exclude", None,
+     [("component_lower", "matches", rf"\A(?:{_EXPLICIT_ALTERNATION})\Z|(?:{_EXPLICIT_ALTERNATION})-")]),
+    ("core_component", "keep", None, [("component_lower", "matches", rf"\A(?:{_CORE_ALTERNATION})(?:-|\Z)")]),
+    ("kernel", "keep", None, [("component_lower", "contains", "kernel"), ("component_lower", "lacks", "texlive")]),
+    # Fallback: the advisory text names a core package (the only rule that reads the full text)
+    ("core_package_text", "keep", None, [("text_lower", "matches", rf"package (?:{_CORE_ALTERNATION})")]),
+    ("whitelist_miss", "exclude", None, []),
+]
+
+def match_core_component(text):
+    """Returns the SYSTEM_CORE_COMPONENTS entry found in text that comes first in the list, or None."""
+    best = None
+    for m in CORE_COMPONENT_PATTERN.finditer(text):
+        rank = CORE_COMPONENT_RANK[m.group(1)]
+        if best is None or rank < best:
+            best = rank
+            if best == 0: break
+    return SYSTEM_CORE_COMPONENTS[best] if best is not None else None
+
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+# "february" / "feb" -> 2
+MONTH_NUMBERS = {name.lower()[:length]: i for i, name in enumerate(MONTH_NAMES, 1) for length in (3, None)}
+# Collector dates as listing pages print them: "Feb 11, 2026", "11 February 2026", "Thu, 12 Feb 2026 10:00:00"
+TEXT_DATE_PATTERNS = [
+    re.compile(r"(?P<month>[A-Za-z]+)\.? (?P<day>\d{1,2}),? (?P<year>\d{4})"),
+    re.compile(r"(?P<day>\d{1,2}) (?P<month>[A-Za-z]+)\.?,? (?P<year>\d{4})"),
+]
+
 def parse_date(date_str):
     """Normalizes date string to YYYY-MM-DD or YYYY-MM"""
     if not date_str: return "Unknown"
     date_str = date_str.strip()
     
     # Format: "2026-February" -> "2026-02"
-    match = re.match(r"(\d{4})-(January|February|March|April|May|June|July|August|September|October|November|December)", date_str, re.IGNORECASE)
+    match = re.match(r"(\d{4})-(" + "|".join(MONTH_NAMES) + ")", date_str, re.IGNORECASE)
     if match:
-        year = match.group(1)
-        month_name = match.group(2)
-        try:
-            dt = datetime.strptime(month_name, "%B")
-            return f"{year}-{dt.month:02d}"
-        except: pass
+        return f"{match.group(1)}-{MONTH_NUMBERS[match.group(2).lower()]:02d}"
 
-    # Format: "Thu, 12 Feb 2026..."
-    try:
-        # Simple extraction of YYYY-MM-DD if ISO format exists
-        if "T" in date_str: return date_str[:10]
-        # Or simplistic parse if standard format failed
-    except: pass
+    # Format: "2026-02-12T10:00:00Z" / "2026-02-12" / "2026-02"
+    match = re.match(r"\d{4}-\d{2}(?:-\d{2})?", date_str)
+    if match:
+        return match.group(0)
+
+    # Format: "Feb 12, 2026" / "12 February 2026" / "Thu, 12 Feb 2026 ..."
+    for pattern in TEXT_DATE_PATTERNS:
+        match = pattern.search(date_str)
+        if match and match.group('month').lower() in MONTH_NUMBERS:
+            month = MONTH_NUMBERS[match.group('month').lower()]
+            return f"{match.group('year')}-{month:02d}-{int(match.group('day')):02d}"
     
     return date_str[:10] # Fallback
 
@@ -101,94 +217,288 @@ def extract_oracle_version(text):
     
     return ""
 
-def extract_redhat_date(text):
-    """Extracts 'Issued: YYYY-MM-DD' from Red Hat full text"""
-    # Try English "Issued: YYYY-MM-DD"
-    match = re.search(r"Issued:\s*(\d{4}-\d{2}-\d{2})", text)
-    if match: return match.group(1)
+# --- ADVISORY SECTIONS ---
+# One tokenizer per vendor walks the advisory text once and records where each
+# section is; the extractors below read their slices from that map. A change in a
+# vendor's page layout only needs its pattern and tokenizer adapted.
 
-    # Try Japanese "発行日: YYYY-MM-DD"
-    match = re.search(r"発行日:\s*(\d{4}-\d{2}-\d{2})", text)
-    if match: return match.group(1)
-    
-    return ""
+RH_SECTION_PATTERN = re.compile(
+    r"(?P<header>RH[SBE]A-\d{4}:\d+ - (?:Security|Bug Fix) Advisory)"
+    r"|Issued:\s*(?P<issued>\d{4}-\d{2}-\d{2})"
+    r"|発行日:\s*(?P<issued_ja>\d{4}-\d{2}-\d{2})"
+    r"|\b(?P<section>Description|Topic|Solution|References)\b"
+)
+ORACLE_SECTION_PATTERN = re.compile(r"(?P<changes>description of changes:)", re.IGNORECASE)
+UBUNTU_SECTION_PATTERN = re.compile(
+    r"(?P<details>details)"
+    r"|(?P<instructions>update instructions)"
+    r"|(?P<versions>following package versions:)"
+    r"|(?P<exposure>reduce your security exposure)"
+    r"|(?P<references>\breferences\b)"
+    r"|publication date\s+(?P<issued>\d{1,2} [a-z]+ \d{4})",
+    re.IGNORECASE
+)
+
+class AdvisorySections:
+    """Section map of one advisory text: {name: (start, end)} spans into text.
+
+    Names used: header, description, changes, details, package_table, references.
+    start is where the advisory proper begins (after page boilerplate) and issued
+    its issue date as printed, or "".
+    """
+    __slots__ = ('text', 'spans', 'start', 'issued')
+
+    def __init__(self, text, spans=None, start=0, issued=""):
+        self.text = text
+        self.spans = spans or {}
+        self.start = start
+        self.issued = issued
+
+    def get(self, name):
+        """The stripped section text, or None if the advisory has no such section."""
+        span = self.spans.get(name)
+        if span is None:
+            return None
+        return self.text[span[0]:span[1]].strip()
+
+def tokenize_redhat(text):
+    header = None
+    issued = issued_ja = ""
+    first = {}  # Description / Topic -> first position after the header
+    ends = {'Solution': [], 'References': []}
+    for m in RH_SECTION_PATTERN.finditer(text):
+        kind = m.lastgroup
+        if kind == 'header':
+            if header is None:
+                # Everything before the first advisory header is cookie/nav boilerplate
+                header = m.start()
+                first, ends = {}, {'Solution': [], 'References': []}
+        elif kind == 'issued':
+            issued = issued or m.group('issued')
+        elif kind == 'issued_ja':
+            issued_ja = issued_ja or m.group('issued_ja')
+        elif m.group('section') in ends:
+            ends[m.group('section')].append(m.start())
+        else:
+            first.setdefault(m.group('section'), m.start())
+
+    start = header or 0
+    sections = AdvisorySections(text, start=start, issued=issued or issued_ja)
+    body = first.get('Description', first.get('Topic'))
+    if header is not None:
+        sections.spans['header'] = (header, body if body is not None else len(text))
+    if body is not None:
+        # From "Description" (or "Topic") until "Solution", else "References"
+        solution = next((p for p in ends['Solution'] if p > body), None)
+        references = [p for p in ends['References'] if p > body]
+        end = solution if solution is not None else (references[0] if references else len(text))
+        sections.spans['description'] = (body, end)
+        # The changes stop at a References list inside the description, too
+        sections.spans['changes'] = (body, min([p for p in references if p < end] or [end]))
+    # The References section follows the description (which may mention "the References section")
+    after = sections.spans['description'][1] if body is not None else start
+    refs = [p for p in ends['References'] if p >= after]
+    if refs:
+        sections.spans['references'] = (refs[0] + len("References"), len(text))
+    return sections
+
+def tokenize_oracle(text):
+    sections = AdvisorySections(text)
+    m = ORACLE_SECTION_PATTERN.search(text)
+    if m:
+        sections.spans['header'] = (0, m.start())
+        sections.spans['changes'] = (m.end(), len(text))
+    return sections
+
+def tokenize_ubuntu(text):
+    marks = {}  # kind -> (start, end) of its first occurrence
+    for m in UBUNTU_SECTION_PATTERN.finditer(text):
+        if m.lastgroup not in marks:
+            marks[m.lastgroup] = m.span(m.lastgroup)
+    sections = AdvisorySections(text, issued=text[slice(*marks['issued'])] if 'issued' in marks else "")
+    if 'details' in marks:
+        sections.spans['header'] = (0, marks['details'][0])
+        end = marks['instructions'][0] if 'instructions' in marks else len(text)
+        sections.spans['details'] = (marks['details'][1], end)
+    if 'instructions' in marks:
+        table_start = marks['versions'][1] if 'versions' in marks else marks['instructions'][1]
+        table_end = min([marks[k][0] for k in ('exposure', 'references')
+                         if k in marks and marks[k][0] > table_start] or [len(text)])
+        sections.spans['package_table'] = (table_start, table_end)
+    if 'references' in marks:
+        sections.spans['references'] = (marks['references'][1], len(text))
+    return sections
+
+# Rows of a USN package table: "24.04 LTS noble runc – 1.3.3-0ubuntu1~24.04.3 runc-stable – ..."
+UBUNTU_PACKAGE_TABLE_PATTERN = re.compile(
+    r"(?P<release>\b\d{2}\.\d{2}(?: LTS)?)\s+[a-z]+\b(?!\s+[–-])"
+    r"|(?P<package>[^\s–]+)\s+[–-]\s+(?P<version>\S+)"
+)
+
+def ubuntu_package_index(sections):
+    """{(release, package): version} for every package listed in a USN, e.g. ('24.04 LTS', 'runc').
+
+    Reads the package table section in one pass (the whole text if the USN has
+    none); package names are lowercased and the first listing of a package wins.
+    """
+    start, end = sections.spans.get('package_table', (0, len(sections.text)))
+    index, release = {}, None
+    for m in UBUNTU_PACKAGE_TABLE_PATTERN.finditer(sections.text, start, end):
+        if m.group('release'):
+            release = m.group('release')
+        elif release:
+            index.setdefault((release, m.group('package').lower()), m.group('version'))
+    return index
+
+def ubuntu_package_version(index, release, component):
+    """Version of component in release: its own row, else the first binary package named after it
+    (libvirt -> libvirt-daemon, microcode -> intel-microcode), else None."""
+    component = component.lower()
+    version = index.get((release, component))
+    if version is not None:
+        return version
+    for (rel, package), version in index.items():
+        if rel == release and (package.startswith(component + "-") or package.endswith("-" + component)):
+            return version
+    return None
 
-def extract_redhat_content(text):
+SECTION_TOKENIZERS = {
+    "Red Hat": tokenize_redhat,
+    "Oracle": tokenize_oracle,
+    "Ubuntu": tokenize_ubuntu,
+}
+
+def tokenize_advisory(vendor, text):
+    """Section map of a raw advisory text (see AdvisorySections)."""
+    tokenizer = SECTION_TOKENIZERS.get(vendor)
+    return tokenizer(text) if tokenizer else AdvisorySections(text)
+
+def extract_redhat_date(text, sections=None):
+    """Extracts 'Issued: YYYY-MM-DD' (or '発行日: YYYY-MM-DD') from Red Hat full text"""
+    sections = sections or tokenize_redhat(text)
+    return sections.issued
+
+def extract_redhat_content(text, sections=None):
     """Clean Red Hat boilerplate and extract Description/Topic/Fixes"""
-    # 1. Remove Top Boilerplate (Cookie Warning & Nav)
-    # The text often starts with <div id="noJavaScript"... or "Skip to..."
-    # We look for the Advisory Header "RHSA-..." or "RHBA-..."
-    
-    header_match = re.search(r"(RH[SBE]A-\d{4}:\d+ - Security Advisory|RH[SBE]A-\d{4}:\d+ - Bug Fix Advisory)", text)
-    start_idx = 0
-    if header_match:
-        start_idx = header_match.start()
-        
-    cleaned_text = text[start_idx:]
-    
-    # 2. Extract Key Sections (Description, Topic, Security Fixes)
-    # We want to capture from "Description" or "Topic" until "Solution" or "References"
-    
-    content = ""
-    
-    # Try finding sections
-    # Note: Case sensitive or insensitive depending on consistency. The JSON suggests "Description" and "Topic" are Capitalized.
-    
-    # Priority 1: Description
-    desc_match = re.search(r"\bDescription\b", cleaned_text)
-    topic_match = re.search(r"\bTopic\b", cleaned_text)
-    
-    extraction_start = -1
-    if desc_match:
-        extraction_start = desc_match.start()
-    elif topic_match:
-        extraction_start = topic_match.start()
-        
-    if extraction_start != -1:
-        # Find end marker
-        sol_match = re.search(r"\bSolution\b", cleaned_text[extraction_start:])
-        ref_match = re.search(r"\bReferences\b", cleaned_text[extraction_start:])
-        
-        extraction_end = len(cleaned_text)
-        if sol_match:
-            extraction_end = extraction_start + sol_match.start()
-        elif ref_match:
-            extraction_end = extraction_start + ref_match.start()
-            
-        return cleaned_text[extraction_start:extraction_end].strip()
-        
-    # Fallback: Just return cleaned text (post-header) truncated
-    return cleaned_text[:1000]
+    sections = sections or tokenize_redhat(text)
+    content = sections.get('description')
+    if content is None:
+        # Fallback: Just return cleaned text (post-header) truncated
+        return sections.text[sections.start:sections.start + 1000]
+    return content
 
-def extract_diff_content(text, vendor):
-    """Extracts relevant 'diff' content (changes) from full text"""
-    lower_text = text.lower()
-    
-    if vendor == "Oracle":
-        # Extract "Description of changes" section
-        marker = "description of changes:"
-        idx = lower_text.find(marker)
-        if idx != -1:
-            return text[idx+len(marker):].strip()
-            
-    elif vendor == "Ubuntu":
-        # Extract "Details" section
-        marker = "details"
-        idx = lower_text.find(marker)
-        if idx != -1:
-            # Try to stop at next section (e.g. "Update instructions")
-            end_marker = "update instructions"
-            end_idx = lower_text.find(end_marker)
-            if end_idx != -1:
-                return text[idx+len(marker):end_idx].strip()
-            return text[idx+len(marker):].strip()
+def extract_diff_content(text, vendor, sections=None):
+    """Extracts relevant 'diff' content (changes) from full text.
+
+    sections, if given, is tokenize_advisory() of the raw advisory text (for Red
+    Hat, before clean_full_text()) and text is not scanned again.
+    """
+    if vendor in SECTION_TOKENIZERS:
+        sections = sections or tokenize_advisory(vendor, text)
+        # Oracle: "Description of changes"; Ubuntu: "Details" up to "Update instructions";
+        # Red Hat: Description/Topic/Fixes up to the references
+        content = sections.get('details' if vendor == "Ubuntu" else 'changes')
+        if content is not None:
+            return content
+        if vendor == "Red Hat":
+            return extract_redhat_content(text, sections)
 
-    elif vendor == "Red Hat":
-        return extract_redhat_content(text)
-            
     # Default: Return cleanedsummary/synopsis
     return text[:500] + "..." if len(text) > 500 else text
 
+# --- ORACLE UEK CHANGELOGS ---
+# diff_content of a UEK erratum is a changelog: "[5.15.0-316.196.4.1]" version headers,
+# each followed by "- subject (author)  [Orabug: N]  {CVE-...}" lines. Cumulative errata
+# repeat most entries of earlier ones (and the mail body lists them twice).
+
+UEK_VERSION_PATTERN = re.compile(r"\[(\d+\.\d+\.\d+-[\w.]+)\]")
+UEK_META_PATTERN = re.compile(r"\s+(?=\[Orabug:|\{CVE-)")
+UEK_ORABUG_PATTERN = re.compile(r"\s*\[Orabug:\s*([\d,\s]+)\]")
+UEK_CVES_PATTERN = re.compile(r"\s*\{([^}]*)\}")
+
+def parse_uek_entry(line, version=""):
+    """Returns (ChangelogEntry, text after it) for a "- ..." changelog line, else (None, line)."""
+    if not line.startswith("- "):
+        return None, line
+    body = line[2:]
+    meta = UEK_META_PATTERN.search(body)
+    head = (body[:meta.start()] if meta else body).rstrip()
+    pos = meta.end() if meta else len(body)
+    orabugs, cves = [], []
+    m = UEK_ORABUG_PATTERN.match(body, pos)
+    while m:
+        orabugs.extend(n.strip() for n in m.group(1).split(",") if n.strip())
+        pos = m.end()
+        m = UEK_ORABUG_PATTERN.match(body, pos)
+    m = UEK_CVES_PATTERN.match(body, pos)
+    if m:
+        cves = CVE_PATTERN.findall(m.group(1))
+        pos = m.end()
+    # The author is the trailing parenthesized name, which may nest: "(Matthieu Baerts (NGI0))"
+    subject, author = head.strip(), ""
+    if head.endswith(")"):
+        depth = 0
+        for i in range(len(head) - 1, -1, -1):
+            depth += {")": 1, "(": -1}.get(head[i], 0)
+            if depth == 0:
+                subject, author = head[:i].strip(), head[i + 1:-1]
+                break
+    return ChangelogEntry(version, subject, author, orabugs, cves), body[pos:]
+
+def parse_uek_changelog(text):
+    """The ChangelogEntry records of a UEK changelog, in text order."""
+    entries, version = [], ""
+    for line in text.splitlines():
+        entry, rest = parse_uek_entry(line, version)
+        if entry:
+            entries.append(entry)
+        headers = UEK_VERSION_PATTERN.findall(rest)
+        if headers:
+            version = headers[-1]
+    return entries
+
+def dedupe_uek_changelog(text, seen=None):
+    """Drops changelog entries whose (subject, author) is in seen, or repeated within text.
+
+    Kept lines are unchanged and their keys added to seen. Version headers left
+    without entries are dropped; other lines (rpm lists, "Related CVEs") are kept.
+    Returns (text, number of entries dropped).
+    """
+    if seen is None:
+        seen = set()
+    out, header, dropped = [], [], 0
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        entry, rest = parse_uek_entry(line)
+        if entry is None:
+            if UEK_VERSION_PATTERN.search(line):
+                # Held back until an entry under it is kept
+                header = [line]
+            elif header and not line.strip():
+                header.append(line)
+            else:
+                out.extend(header)
+                header = []
+                out.append(line)
+            continue
+        if rest.strip():
+            # "... {CVE-x} Oracle Linux 9 Description of changes: [5.15...]": the glued tail is its own line
+            lines.insert(i, rest.lstrip())
+            line = line[:len(line) - len(rest)]
+        if entry.key in seen:
+            dropped += 1
+            continue
+        seen.add(entry.key)
+        out.extend(header)
+        header = []
+        out.append(line)
+    if dropped and out and not out[-1].strip():
+        out.pop()
+    return "\n".join(out), dropped
+
 def get_component_name(vendor, title, summary, full_text):
     text = (title + " " + summary + " " + full_text).lower()
     text_primary = (title + " " + summary).lower()
@@ -213,13 +523,9 @@ def get_component_name(vendor, title, summary, full_text):
     
     # 2. Ubuntu/RHEL Heuristics
     # Search primary text first to avoid false positives from body
-    for core in SYSTEM_CORE_COMPONENTS:
-        if re.search(fr'\b{re.escape(core)}\b', text_primary):
-            return core
-            
-    for core in SYSTEM_CORE_COMPONENTS:
-        if re.search(fr'\b{re.escape(core)}\b', text):
-            return core
+    core = match_core_component(text_primary) or match_core_component(text)
+    if core:
+        return core
             
     m = re.search(r'([a-z0-9]+(-[a-z0-9]+)*)-\d+\.\d+', text_primary)
     if not m:
@@ -255,211 +561,1270 @@ def extract_specific_version(text, component, patch_id=None):
         if m: return m.group(1)
     return ""
 
+# --- FILTER RULE ENGINE ---
+
+class AdvisoryView:
+    """An advisory as the filter rules see it: raw fields plus derived ones.
+
+    Derived fields (VIEW_FIELDS) are computed on first use and kept, so each is
+    lowercased at most once per advisory. A raw field may be a callable: the full
+    text is then only loaded if a rule gets as far as reading it.
+    """
+    __slots__ = ('vendor', 'fields')
+
+    def __init__(self, vendor, **fields):
+        self.vendor = vendor
+        self.fields = fields
+
+    def __getitem__(self, name):
+        fields = self.fields
+        if name not in fields:
+            fields[name] = VIEW_FIELDS[name](self)
+        elif callable(fields[name]):
+            fields[name] = fields[name]()
+        return fields[name]
+
+VIEW_FIELDS = {
+    'title_lower': lambda view: view['title'].lower(),
+    'summary_lower': lambda view: view['summary'].lower(),
+    'component_lower': lambda view: view['component'].lower(),
+    'text_lower': lambda view: view['text'].lower(),
+    'text_head_lower': lambda view: view['text'][:500].lower(),
+}
+
+def compile_condition(field, op, value):
+    if op == "contains":
+        return lambda view: value in view[field]
+    if op == "lacks":
+        return lambda view: value not in view[field]
+    if op == "matches":
+        pattern = re.compile(value)
+        return lambda view: pattern.search(view[field]) is not None
+    if op == "equals":
+        return lambda view: view[field] == value
+    if op == "shorter_than":
+        return lambda view: len(view[field]) < value
+    raise ValueError(f"Unknown rule op: {op}")
+
+def compile_rules(rules):
+    """Turns a rule table into [(name, action, vendors, [test])], compiling every pattern once."""
+    return [(name, action, frozenset(vendors) if vendors else None,
+             [compile_condition(*condition) for condition in conditions])
+            for name, action, vendors, conditions in rules]
+
+def evaluate_rules(compiled, view):
+    """(name, action) of the first rule that fires for view, or None."""
+    for name, action, vendors, tests in compiled:
+        if vendors is not None and view.vendor not in vendors:
+            continue
+        if all(test(view) for test in tests):
+            return name, action
+    return None
+
+COMPILED_EXCLUSION_RULES = compile_rules(EXCLUSION_RULES)
+COMPILED_PRUNE_RULES = compile_rules(PRUNE_RULES)
+
 def is_system_critical(vendor, component, text):
-    comp = component.lower()
-    # Rule 1: Oracle UEK Only
-    if vendor == "Oracle":
-        return "kernel-uek" in comp
-    
-    # Rule 2: Strict Whitelist (RHEL/Ubuntu)
-    for bad in EXCLUDED_PACKAGES_EXPLICIT:
-        if bad == comp or (f"{bad}-" in comp): return False
+    return prune_rule(vendor, component, text) is None
 
-    for core in SYSTEM_CORE_COMPONENTS:
-        if core == comp: return True
-        if comp.startswith(f"{core}-"): return True
-        if f"package {core}" in text.lower(): return True
+def prune_rule(vendor, component, text):
+    """Returns the name of the pruning rule that drops this patch, or None if it is system critical.
 
-    if "kernel" in comp and "texlive" not in comp: return True
-    return False
+    text may be a callable so the full text is only loaded when the component
+    rules (see PRUNE_RULES) did not decide.
+    """
+    name, action = evaluate_rules(COMPILED_PRUNE_RULES, AdvisoryView(vendor, component=component, text=text))
+    return name if action == "exclude" else None
 
-def preprocess_patches():
-    print(f"Loading data from {JSON_DIR}...")
+def exclusion_rule(vendor, patch_id, title, summary, full_text):
+    """Returns the name of the ingest filter (see EXCLUSION_RULES) that drops this advisory, or None to keep it."""
+    view = AdvisoryView(vendor, id=patch_id, title=title, summary=summary, text=full_text)
+    matched = evaluate_rules(COMPILED_EXCLUSION_RULES, view)
+    return matched[0] if matched else None
+
+def ingest_advisory(json_path, stats=None, keep_full_text=False):
+    """Parses one batch_data JSON file into Patch records (one per dist version).
+
+    Returns an empty list when the advisory is excluded by exclusion_rule(); the
+    rule name is stored in stats['excluded_by'] if a stats dict is given. Unless
+    keep_full_text, records leave full_text on disk (see load_full_text) and only
+    keep what later steps use: the diff, the summary and the CVE list.
+    """
+    with open(json_path, 'r', encoding='utf-8') as jf:
+        data = json.load(jf)
+        
+    vendor = data.get('vendor', 'Unknown')
+    patch_id = data.get('id', os.path.basename(json_path).replace('.json', ''))
     
-    raw_list = []
+    # Normalization
+    date_raw = data.get('pubDate', data.get('dateStr', ''))
+    date_str = parse_date(date_raw)
     
-    # --- Step 1: Ingest JSONs directly ---
-    json_files = glob.glob(os.path.join(JSON_DIR, "*.json"))
-    print(f"Found {len(json_files)} JSON files.")
+    title = data.get('title', '')
+    summary = data.get('synopsis', '')
+    full_text = data.get('full_text', '') 
+    
+    # One pass over the raw text finds every section the extractors below need
+    sections = tokenize_advisory(vendor, full_text)
+
+    # Content Cleaning (Red Hat)
+    if vendor == "Red Hat":
+        rh_date = extract_redhat_date(full_text, sections)
+        full_text = extract_redhat_content(full_text, sections)
+        if rh_date: date_str = rh_date
+        if not summary:
+            summary = title # Fallback
+        
+    excluded_by = exclusion_rule(vendor, patch_id, title, summary, full_text)
+    if excluded_by:
+        if stats is not None: stats['excluded_by'] = excluded_by
+        return []
+    
+    component = get_component_name(vendor, title, summary, full_text)
+    specific_ver = extract_specific_version(full_text, component, patch_id)
+    
+    # Extract diff content for history/summary
+    diff_content = extract_diff_content(full_text, vendor, sections)
+    if not diff_content: diff_content = summary
+    if component.startswith("kernel-uek"):
+        diff_content = dedupe_uek_changelog(diff_content)[0]
+
+    # --- DIST VERSION EXTRACTION & SPLITTING ---
+    dist_versions = []
+    if vendor == "Ubuntu":
+        # Find all "XX.XX LTS" patterns and filter out EOL versions
+        lts_matches = re.findall(r"(\d{2}\.\d{2} LTS)", full_text + " " + title)
+        if lts_matches:
+            active_lts = [v for v in sorted(set(lts_matches)) if v not in UBUNTU_EOL_LTS_VERSIONS]
+            dist_versions = active_lts
+        # Non-LTS versions (25.10, etc.) are intentionally NOT included (not supported)
+    
+    elif vendor == "Oracle":
+        # Extracted in get_component_name, but let's formalize here
+        ol_ver = extract_oracle_version(full_text + " " + title) # e.g. "ol9"
+        if ol_ver:
+            dist_versions = [ol_ver.replace("ol", "")] # "9"
+    
+    elif vendor == "Red Hat":
+        # Look for "Red Hat Enterprise Linux X"
+        rhel_matches = re.findall(r"Red Hat Enterprise Linux (\d+)", full_text)
+        if rhel_matches:
+            dist_versions = sorted(list(set(rhel_matches)))
+    
+    if not dist_versions:
+        dist_versions = ["Unknown"]
+
+    package_index = ubuntu_package_index(sections) if vendor == "Ubuntu" else {}
+
+    # One string shared by every dist-version split of this advisory
+    record_full_text = full_text + " " + title
+    cves = extract_cves(diff_content, record_full_text)
+
+    records = []
+    for dist_ver in dist_versions:
+        # Create a specific ID for this split if multiple
+        unique_id = patch_id
+        if len(dist_versions) > 1:
+            unique_id = f"{patch_id}-{dist_ver.replace(' ','_')}"
+        
+        # Re-extract component/version specific to this dist_ver context if possible
+        # (For now, we use the global extraction but hint the Agent)
+        
+        # Attempt to extract detection specific to this Dist Version if provided
+        target_specific_ver = specific_ver
+        
+        if vendor == "Ubuntu":
+           # The package table row for this release: "24.04 LTS noble runc – 1.3.3-..."
+           target_specific_ver = ubuntu_package_version(package_index, dist_ver, component) or specific_ver
+
+        records.append(Patch(
+            id=unique_id,
+            original_id=patch_id,
+            vendor=vendor,
+            dist_version=dist_ver,
+            date=date_str,
+            component=component,
+            specific_version=target_specific_ver,
+            summary=summary,
+            diff_content=diff_content,
+            full_text=record_full_text if keep_full_text else None,
+            ref_url=data.get('url', ''),
+            source=json_path
+        ))
+        records[-1].cves = cves
+
+    return records
+
+def clean_full_text(vendor, full_text):
+    # Content Cleaning (Red Hat)
+    if vendor == "Red Hat":
+        return extract_redhat_content(full_text)
+    return full_text
+
+def load_full_text(json_path):
+    """Rereads a record's full_text (the cleaned advisory text plus its title) from batch_data."""
+    with open(json_path, 'r', encoding='utf-8') as jf:
+        data = json.load(jf)
+    return clean_full_text(data.get('vendor', 'Unknown'), data.get('full_text', '')) + " " + data.get('title', '')
+
+Patch.text_loader = load_full_text
+
+def rules_fingerprint():
+    """Hash of the rule tables; any change to them invalidates the ingest cache."""
+    rules = [
+        INGEST_CACHE_VERSION,
+        SYSTEM_CORE_COMPONENTS,
+        EXCLUDED_PACKAGES_EXPLICIT,
+        EXCLUSION_RULES,
+        PRUNE_RULES,
+        sorted(UBUNTU_EOL_LTS_VERSIONS),
+    ]
+    return hashlib.sha256(json.dumps(rules).encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_ingest_cache(cache_path):
+    """Returns {json_path: entry} for the current rules, or {} if missing/stale.
+
+    Each entry holds the file's size, mtime_ns and sha256 plus the records
+    ingest_advisory() produced for it, as Patch.to_dict() dicts, and the
+    exclusion rule that dropped it (if any).
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get('rules') != rules_fingerprint():
+        print("Ingest cache built with different rules. Rebuilding.")
+        return {}
+    return cache.get('files', {})
+
+def save_ingest_cache(cache_path, entries):
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'rules': rules_fingerprint(), 'files': entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+def check_file(json_path, entry):
+    """Compares json_path with a previously recorded entry. Returns (stat_entry, unchanged).
+
+    Size + mtime is the fast path; if either differs the content hash decides,
+    so a touched-but-unchanged file still counts as unchanged.
+    """
+    st = os.stat(json_path)
+    stat_entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+        stat_entry['sha256'] = entry['sha256']
+        return stat_entry, True
+    stat_entry['sha256'] = file_sha256(json_path)
+    return stat_entry, bool(entry) and entry['sha256'] == stat_entry['sha256']
+
+def lookup_ingest_cache(entries, json_path):
+    """Returns (records, stat_entry). records is None on a cache miss."""
+    entry = entries.get(json_path)
+    stat_entry, unchanged = check_file(json_path, entry)
+    if not unchanged:
+        return None, stat_entry
+    stat_entry['excluded_by'] = entry.get('excluded_by')
+    return [Patch.from_dict(d) for d in entry['records']], stat_entry
+
+# --- DATE WINDOW (--quarter / --days) ---
+
+def date_window(quarter=None, days=None, today=None):
+    """(start, end) dates, end exclusive, exactly like parseDateRange() in batch_collector.js.
+
+    Quarter mode starts one month before the quarter (cumulative patch context) and
+    ends on the first day of the next quarter. Lookback mode snaps the start to the
+    first of the month and ends tomorrow (today included).
+    """
+    if quarter:
+        m = re.match(r"^(\d{4})-Q([1-4])$", quarter)
+        if not m:
+            raise ValueError("Invalid quarter format. Use YYYY-QN (e.g., 2026-Q1)")
+        year, q = int(m.group(1)), int(m.group(2))
+        start_month = (q - 1) * 3  # 0-indexed, like JS Date months
+        start = date(year + (start_month - 1) // 12, (start_month - 1) % 12 + 1, 1)
+        end = date(year + (start_month + 3) // 12, (start_month + 3) % 12 + 1, 1)
+        return start, end
+    today = today or date.today()
+    start = (today - timedelta(days=days or DEFAULT_LOOKBACK_DAYS)).replace(day=1)
+    return start, today + timedelta(days=1)
+
+# Top-level keys as JSON.stringify(data, null, 2) writes them. String values escape
+# newlines, so a line-anchored match can never hit text inside full_text.
+TOP_LEVEL_META = re.compile(rb'^  "(id|vendor|pubDate|dateStr)": "((?:[^"\\\n]|\\.)*)"', re.MULTILINE)
+
+def read_advisory_meta(json_path):
+    """{'id', 'vendor', 'date'} of a batch_data file, without decoding its full text.
+
+    date is the collector's date (pubDate, else dateStr) normalized by parse_date();
+    Red Hat advisories get a more precise date from their text at ingest.
+    """
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    found = {key.decode(): json.loads(b'"' + value + b'"') for key, value in TOP_LEVEL_META.findall(raw)}
+    if 'vendor' not in found:
+        # Not collector-formatted: fall back to a full parse
+        data = json.loads(raw)
+        found = {key: data[key] for key in ('id', 'vendor', 'pubDate', 'dateStr') if isinstance(data.get(key), str)}
+    return {
+        'id': found.get('id', os.path.basename(json_path).replace('.json', '')),
+        'vendor': found.get('vendor', 'Unknown'),
+        'date': parse_date(found.get('pubDate', found.get('dateStr', ''))),
+    }
+
+def load_metadata_index(directory):
+    try:
+        with open(os.path.join(directory, METADATA_INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_metadata_index(directory, index):
+    path = os.path.join(directory, METADATA_INDEX_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
 
+def filter_by_window(json_files, window, report, prune=True):
+    """Keeps the files whose collector date falls in window ((start, end), end exclusive).
+
+    Dates come from the directory's metadata sidecar (entries are keyed by file name
+    and revalidated by size + mtime); only new or changed files are read. Files with
+    no usable date are kept, and listed so the collector format can be fixed. With
+    prune, json_files is the full directory listing and sidecar entries of files not
+    in it are dropped; pass prune=False for a partial list (one --watch poll).
+    """
+    start, end = (d.isoformat() for d in window)
+    kept = []
+    indexes = {}
+    dirty = set()
     for json_path in json_files:
-        try:
-            with open(json_path, 'r', encoding='utf-8') as jf:
-                data = json.load(jf)
-                
-            vendor = data.get('vendor', 'Unknown')
-            patch_id = data.get('id', os.path.basename(json_path).replace('.json', ''))
-            
-            # Normalization
-            date_raw = data.get('pubDate', data.get('dateStr', ''))
-            date_str = parse_date(date_raw)
-            
-            title = data.get('title', '')
-            summary = data.get('synopsis', '')
-            full_text = data.get('full_text', '') 
-            
-            # Content Cleaning (Red Hat)
-            if vendor == "Red Hat":
-                rh_date = extract_redhat_date(full_text)
-                full_text = extract_redhat_content(full_text)
-                if rh_date: date_str = rh_date
-                if not summary:
-                    summary = title # Fallback
-                
-            # --- EXCLUSION FILTERS ---
-            # 1. Garbage Data (Empty Content or Known Bad ID)
-            # Also exclude OpenShift product advisories (not RHEL core)
-            if "openshift" in title.lower() or "openshift" in summary.lower():
+        directory, name = os.path.split(json_path)
+        index = indexes.get(directory)
+        if index is None:
+            index = indexes[directory] = load_metadata_index(directory)
+        st = os.stat(json_path)
+        meta = index.get(name)
+        if not meta or meta['size'] != st.st_size or meta['mtime_ns'] != st.st_mtime_ns:
+            try:
+                meta = read_advisory_meta(json_path)
+            except (OSError, ValueError):
+                # Let ingest report the broken file
+                kept.append(json_path)
                 continue
-            if "extended lifecycle" in title.lower() or "extended lifecycle" in summary.lower() or "extended lifecycle" in full_text.lower()[:500]:
+            meta.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            index[name] = meta
+            dirty.add(directory)
+        key = advisory_store.date_key(meta['date'])
+        if not key:
+            report.count("advisory_files_undated")
+            print(f"Keeping {name}: no usable collector date ({meta['date']!r}).")
+            kept.append(json_path)
+        elif start <= key < end:
+            kept.append(json_path)
+        else:
+            report.count("advisory_files_outside_window")
+
+    present = {}
+    for json_path in json_files:
+        directory, name = os.path.split(json_path)
+        present.setdefault(directory, set()).add(name)
+    for directory, index in indexes.items():
+        for name in (set(index) - present[directory]) if prune else ():
+            del index[name]
+            dirty.add(directory)
+        if directory in dirty:
+            save_metadata_index(directory, index)
+    return kept
+
+def intern_record_texts(record, pool):
+    """Points the large text fields of record at one canonical copy per distinct value."""
+    for field in ('full_text', 'diff_content', 'summary'):
+        if field == 'full_text' and not record.full_text_loaded:
+            continue
+        text = getattr(record, field)
+        if text:
+            setattr(record, field, pool.setdefault(text, text))
+
+def text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:20]
+
+def share_texts(cand, texts):
+    """Moves large text fields of cand and its history into texts, leaving {"text_ref": key}.
+
+    Returns the (key, text) pairs that were not in texts before.
+    """
+    added = []
+    for entry in [cand] + cand.get('history', []):
+        for field in SHARED_TEXT_FIELDS:
+            text = entry.get(field)
+            if not isinstance(text, str) or len(text) < SHARED_TEXT_MIN_LEN:
                 continue
-            if "rhel 7" in title.lower() and vendor == "Red Hat":
+            key = text_key(text)
+            if key not in texts:
+                texts[key] = text
+                added.append((key, text))
+            entry[field] = {'text_ref': key}
+    return added
+
+def _indented_json(obj, prefix):
+    return json.dumps(obj, indent=2, ensure_ascii=False).replace("\n", "\n" + prefix)
+
+def _ingest_worker(json_path, keep_full_text=False):
+    """Process pool entry point: never raises, so one bad file cannot abort the pool."""
+    stats = {'excluded_by': None, 'size': 0}
+    start = time.perf_counter()
+    try:
+        stats['size'] = os.path.getsize(json_path)
+        records, error = ingest_advisory(json_path, stats, keep_full_text), None
+    except Exception as e:
+        records, error = [], e
+    stats['seconds'] = time.perf_counter() - start
+    return json_path, records, error, stats
+
+def ingest_all(json_files, workers=1, keep_full_text=False):
+    """Yields (json_path, records, error, stats) in the same order as json_files.
+
+    stats holds the file size, parse time and the exclusion rule that dropped it (if any).
+    """
+    worker = functools.partial(_ingest_worker, keep_full_text=keep_full_text)
+    if workers > 1 and len(json_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(json_files) // (workers * 4))
+            yield from pool.map(worker, json_files, chunksize=chunksize)
+    else:
+        for json_path in json_files:
+            yield worker(json_path)
+
+def packet_path(output_format):
+    """patches_for_llm_review.json, or .jsonl for the streaming format."""
+    if output_format == "jsonl":
+        return os.path.splitext(OUTPUT_FILE)[0] + ".jsonl"
+    return OUTPUT_FILE
+
+def load_from_directory(json_files, workers, cache_path, report):
+    """Ingests json_files (through the ingest cache if enabled). Returns (raw_list, files parsed)."""
+    raw_list = []
+    # Identical texts (dist-version splits, cache reloads) share one string object
+    text_pool = {}
+    
+    # Unchanged files are served from the ingest cache; only the rest are parsed
+    new_entries = {}
+    results = {}
+    to_parse = []
+    if cache_path:
+        cached_entries = load_ingest_cache(cache_path)
+        for json_path in json_files:
+            records, stat_entry = lookup_ingest_cache(cached_entries, json_path)
+            new_entries[json_path] = stat_entry
+            if records is None:
+                to_parse.append(json_path)
+            else:
+                results[json_path] = (records, None, stat_entry['excluded_by'])
+        print(f"Ingest cache: {len(results)} unchanged, {len(to_parse)} to parse.")
+    else:
+        # --no-cache: every file is parsed; nothing is hashed or recorded
+        to_parse = list(json_files)
+    if workers > 1:
+        print(f"Parallel ingest with {workers} workers.")
+
+    for json_path, records, error, stats in ingest_all(to_parse, workers):
+        results[json_path] = (records, error, stats['excluded_by'])
+        if cache_path:
+            new_entries[json_path]['excluded_by'] = stats['excluded_by']
+        report.observe_item(json_path, stats['seconds'], stats['size'])
+
+    for json_path in json_files:
+        records, error, excluded_by = results[json_path]
+        if error is not None:
+            # Not cached, so the file is retried on the next run
+            new_entries.pop(json_path, None)
+            report.count("ingest_errors")
+            print(f"Error reading {json_path}: {error}")
+            continue
+        if cache_path:
+            new_entries[json_path]['records'] = [record.to_dict(lazy=True) for record in records]
+        if excluded_by:
+            report.count("excluded_advisories", rule=excluded_by)
+        # Log if we are splitting
+        if len(records) > 1:
+            print(f"Splitting {records[0].original_id} into versions: {[r.dist_version for r in records]}")
+        for record in records:
+            intern_record_texts(record, text_pool)
+        raw_list.extend(records)
+
+    if cache_path:
+        save_ingest_cache(cache_path, new_entries)
+
+    return raw_list, len(to_parse)
+
+def sync_store(conn, json_files, workers, report):
+    """Loads new or changed batch_data files into the advisory store and drops deleted ones.
+
+    Returns how many files were parsed.
+    """
+    stored = advisory_store.file_entries(conn)
+    stat_entries = {}
+    to_parse = []
+    with conn:
+        for json_path in json_files:
+            stat_entry, unchanged = check_file(json_path, stored.get(json_path))
+            if unchanged:
+                if stat_entry['mtime_ns'] != stored[json_path]['mtime_ns']:
+                    advisory_store.touch_file(conn, json_path, stat_entry)
                 continue
-            if (len(full_text) < 50 and vendor == "Red Hat") or patch_id == "RHSA-2026:2664":
+            stat_entries[json_path] = stat_entry
+            to_parse.append(json_path)
+        advisory_store.remove_files(conn, set(stored) - set(json_files))
+    print(f"Advisory store: {len(json_files) - len(to_parse)} unchanged, {len(to_parse)} to parse.")
+    if workers > 1:
+        print(f"Parallel ingest with {workers} workers.")
+
+    with conn:
+        # The store keeps the text for FTS, so it is not left on disk here
+        for json_path, records, error, stats in ingest_all(to_parse, workers, keep_full_text=True):
+            report.observe_item(json_path, stats['seconds'], stats['size'])
+            if error is not None:
+                # Its old rows go too, so the file is retried on the next run
+                advisory_store.remove_files(conn, {json_path})
+                report.count("ingest_errors")
+                print(f"Error reading {json_path}: {error}")
                 continue
-                
-            # 2. Ubuntu Variant Exclusions
-            if vendor == "Ubuntu" and "kernel" in title.lower():
-                # Ubuntu patches applying to the base x86_64 kernel will always list
-                # the "linux - Linux kernel" package in the security advisory text.
-                # If a patch applies exclusively to variants (AWS, GCP, NVIDIA, FIPS, etc.),
-                # this base package string will be absent.
-                if "linux - linux kernel" not in full_text.lower():
+            advisory_store.put_file(conn, json_path, stat_entries[json_path], records, stats['excluded_by'])
+    return len(to_parse)
+
+def load_from_store(db_path, json_files, workers, report, query):
+    """Syncs batch_data into the SQLite store and reads raw patches back with an indexed query.
+
+    query holds optional 'vendors', 'components', 'since' and 'until' filters; with
+    query['ingest_only'] set, only the sync runs and raw_list is None.
+    """
+    conn = advisory_store.open_store(db_path, rules_fingerprint())
+    try:
+        parsed = sync_store(conn, json_files, workers, report)
+        for rule, n in advisory_store.exclusion_counts(conn).items():
+            report.count("excluded_advisories", n, rule=rule)
+        if query.get('ingest_only'):
+            print(f"Loaded batch_data into {db_path}.")
+            return None, parsed
+
+        # Records read their text back from the store instead of reparsing batch_data
+        Patch.text_loader = advisory_store.TextLoader(db_path, load_full_text)
+        text_pool = {}
+        raw_list = []
+        for record in advisory_store.query_patches(conn, query.get('vendors'), query.get('components'),
+                                                   query.get('since'), query.get('until'), lazy_text=True):
+            intern_record_texts(record, text_pool)
+            raw_list.append(record)
+    finally:
+        conn.close()
+    return raw_list, parsed
+
+def preprocess_patches(workers=1, cache_path=INGEST_CACHE_FILE, output_format="json", shared_texts=False,
+                       report=None, db_path=None, query=None, cve_index_path=None, window=None,
+                       token_budget=None, review_cache=None, baseline_path=None, exclusions=None,
+                       mark_exclusions=False, near_duplicate_threshold=None):
+    output_file = packet_path(output_format)
+    baseline = report_delta.load_baseline(baseline_path) if baseline_path else None
+    if report is None:
+        report = RunReport("patch_preprocessing")
+    query = query or {}
+    print(f"Loading data from {JSON_DIR}...")
+    
+    # --- Step 1: Ingest JSONs directly (or from the advisory store) ---
+    # Sorted so that serial and parallel runs produce byte-identical packets
+    json_files = list_advisory_files(JSON_DIR)
+    print(f"Found {len(json_files)} JSON files.")
+    if window:
+        print(f"Date range: {window[0]} ~ {window[1]} (exclusive)")
+    with report.stage("ingest"):
+        if window and db_path:
+            # The store keeps every quarter; the window only narrows the query
+            query = dict(query, since=query.get('since') or window[0].isoformat(),
+                         until=query.get('until') or window[1].isoformat())
+        elif window:
+            json_files = filter_by_window(json_files, window, report)
+            print(f"{len(json_files)} JSON files in range.")
+        if db_path:
+            raw_list, parsed = load_from_store(db_path, json_files, workers, report, query)
+        else:
+            raw_list, parsed = load_from_directory(json_files, workers, cache_path, report)
+    if raw_list is None:
+        return report
+
+    try:
+        ingest_seconds = report.stages["ingest"]["seconds"]
+        report.count("advisory_files", len(json_files))
+        report.count("advisory_files_parsed", parsed)
+        report.count("raw_patches", len(raw_list))
+        report.gauge("ingest_files_per_second", len(json_files) / ingest_seconds if ingest_seconds else 0.0)
+        print(f"Raw Patches: {len(raw_list)}")
+
+        # --- Step 2: Pruning ---
+        with report.stage("prune"):
+            pruned_list = prune_patches(raw_list, report, exclusions, mark_exclusions)
+        report.count("pruned_candidates", len(pruned_list))
+        print(f"Pruned Candidates: {len(pruned_list)}")
+
+        # --- Step 3: Aggregation ---
+        with report.stage("aggregate_and_write"):
+            grouped = group_patches(pruned_list)
+            cve_index = build_cve_index(grouped)
+            report.count("unique_cves", len(cve_index))
+            report.count("cross_vendor_cves", sum(1 for entries in cve_index.values()
+                                                   if len({vendor for vendor, _, _ in entries}) > 1))
+            if cve_index_path:
+                write_cve_index(cve_index, cve_index_path)
+                print(f"Saved CVE index ({len(cve_index)} CVEs) to {cve_index_path}")
+
+            # Pruned records now live only in their groups; let the rest be collected
+            del raw_list, pruned_list
+
+            grouped = apply_baseline(grouped, baseline, baseline_path, output_file, report)
+            count = write_output(grouped, cve_index, output_file, output_format, shared_texts, token_budget, report,
+                                 review_cache, near_duplicate_threshold)
+        report.count("final_candidates", count)
+        print(f"Final Candidates for LLM: {count}")
+        if not token_budget:
+            print(f"Saved review packet to {output_file}")
+        return report
+    finally:
+        if db_path:
+            # The packet is written: release the store connection behind lazily loaded texts
+            Patch.text_loader.close()
+            Patch.text_loader = load_full_text
+
+def newer_than_baseline(group, row):
+    """Patches of a (latest first) group that came after the baseline row's advisory."""
+    ids = [p.id for p in group]
+    if row["Issue ID"] in ids:
+        return group[:ids.index(row["Issue ID"])]
+    # The baseline advisory fell out of this run's window: compare dates instead
+    since = advisory_store.date_key(row["Date"])
+    return [p for p in group if advisory_store.date_key(p.date) > since]
+
+def classify_groups(grouped, baseline):
+    """Returns ({group key: group} still to review, {(vendor, component): status}).
+
+    See report_delta.py for the statuses; unchanged groups are left out of the packet.
+    """
+    to_review = {}
+    statuses = {}
+    for key, group in grouped.items():
+        row = baseline.get(key)
+        if row is None:
+            statuses[key] = 'new'
+        elif any(is_critical(p.full_text + " " + p.summary) or is_critical(p.diff_content)
+                 for p in newer_than_baseline(group, row)):
+            statuses[key] = 'superseded'
+        else:
+            statuses[key] = 'unchanged'
+            continue
+        to_review[key] = group
+    for key in baseline:
+        statuses.setdefault(key, 'dropped')
+    return to_review, statuses
+
+def apply_baseline(grouped, baseline, baseline_path, output_file, report):
+    """Narrows grouped to new and superseded groups and records the classification next to the packet."""
+    path = report_delta.delta_path(output_file)
+    if baseline is None:
+        # A classification left over from an earlier --baseline run no longer describes this packet
+        if os.path.exists(path):
+            os.remove(path)
+        return grouped
+    grouped, statuses = classify_groups(grouped, baseline)
+    report_delta.write_delta(statuses, path, baseline_path)
+    counts = report_delta.summary(statuses)
+    for status, n in counts.items():
+        report.count("delta_groups", n, status=status)
+    print(f"Baseline {baseline_path}: {counts['new']} new, {counts['superseded']} superseded, "
+          f"{counts['unchanged']} unchanged, {counts['dropped']} dropped group(s). Saved {path}")
+    return grouped
+
+def near_duplicate_folds(group, threshold=near_duplicates.THRESHOLD):
+    """{representative index: [(member index, similarity)]} for the near-duplicate clusters of one group.
+
+    The lead and the older patches are clustered on diff_content (see
+    near_duplicates.py). The newest patch of a cluster represents it, so the lead is
+    never folded into a history entry. Known exclusions stay out: the reviewer does
+    not select them, so the representative's verdict does not hold for them.
+    Positions are used rather than IDs, as a split row may also arrive as a file of its own.
+    """
+    items = [(i, None, p.diff_content) for i, p in enumerate(group) if p.known_exclusion is None]
+    return {members[0][0]: members[1:] for members in near_duplicates.cluster(items, threshold)}
+
+def near_duplicate_list(group, members):
+    """The near_duplicates packet field for the (index, similarity) members of a fold, or None."""
+    if not members:
+        return None
+    return [{'id': group[i].id, 'dist_version': group[i].dist_version, 'specific_version': group[i].specific_version,
+             'date': group[i].date, 'ref_url': group[i].ref_url, 'cves': group[i].cves, 'similarity': round(score, 3)}
+            for i, score in members]
+
+def list_advisory_files(directory):
+    """Sorted advisory files of a batch_data directory, so serial and parallel runs produce byte-identical packets."""
+    return sorted(path for path in glob.glob(os.path.join(directory, "*.json"))
+                  if os.path.basename(path) != COLLECTION_FAILURES_FILE)
+
+def annotate_cached_verdicts(candidates, cache, report=None):
+    """Adds the reviewer's cached verdict to leads and history entries whose exact text it already scored.
+
+    The keys match perform_actual_review.review_item, so a changed advisory gets no annotation.
+    """
+    for cand in candidates:
+        targets = [(cand, lead_texts(cand))] + [(h, (h.diff_summary,)) for h in cand.history or []]
+        for target, texts in targets:
+            entry = cache.peek(target.id, texts)
+            if entry is not None:
+                target.cached_verdict = {k: entry[k] for k in ('impacts', 'en', 'ko', 'override') if k in entry}
+                if report is not None:
+                    report.count("cached_verdicts")
+        yield cand
+
+def write_output(grouped, cve_index, output_file, output_format="json", shared_texts=False,
+                 token_budget=None, report=None, review_cache=None, near_duplicate_threshold=None):
+    """Writes the review packet (or its shards) for grouped and returns the candidate count.
+
+    grouped is consumed. A single packet is written to a temporary file first, so a
+    reviewer reading it during --watch never sees a half-written packet.
+    """
+    candidates = iter_review_candidates(grouped, cve_index, token_budget, near_duplicate_threshold, report)
+    if review_cache is not None:
+        candidates = annotate_cached_verdicts(candidates, review_cache, report)
+    if token_budget:
+        return write_shards(candidates, output_file, token_budget, output_format, shared_texts, report)
+    tmp_path = output_file + ".tmp"
+    count = write_packet(candidates, tmp_path, output_format, shared_texts)
+    os.replace(tmp_path, output_file)
+    # Shards of an earlier --token-budget run would otherwise be reviewed instead
+    remove_stale_shards(output_file)
+    return count
+
+def watch_patches(workers=1, output_format="json", shared_texts=False, report=None, window=None,
+                  token_budget=None, poll_seconds=WATCH_POLL_SECONDS, idle_exit=None, review_cache=None,
+                  baseline_path=None, exclusions=None, mark_exclusions=False, near_duplicate_threshold=None):
+    """Follows a running batch_collector.js and keeps the packet up to date.
+
+    Every poll, advisory files whose size and mtime did not change since the previous
+    poll are ingested and pruned; changed files are re-ingested. The groups are then
+    rebuilt in file order and the packet rewritten, so once the collector is done it
+    matches a one-shot run. Stops on Ctrl-C, or after idle_exit seconds without any
+    new or still-growing file.
+    """
+    if report is None:
+        report = RunReport("patch_preprocessing")
+    output_file = packet_path(output_format)
+    baseline = report_delta.load_baseline(baseline_path) if baseline_path else None
+    pending = {}  # path -> (size, mtime_ns) seen at the last poll
+    done = {}     # path -> (size, mtime_ns) when ingested
+    pruned = {}   # path -> pruned records of that file
+    last_activity = time.monotonic()
+    print(f"Watching {JSON_DIR} every {poll_seconds}s (Ctrl-C to stop)...")
+    try:
+        while True:
+            ready = []
+            json_files = list_advisory_files(JSON_DIR)
+            present = set(json_files)
+            removed = set(done) - present
+            for json_path in removed:
+                del done[json_path]
+            for json_path in set(pending) - present:
+                del pending[json_path]
+            changed = {(p.vendor, p.component) for path in removed for p in pruned.pop(path, [])}
+            for json_path in json_files:
+                try:
+                    st = os.stat(json_path)
+                except FileNotFoundError:
                     continue
-                
-            # 3. User Blacklist (SAP, kernel-rt)
-            if "SAP" in title or "Update Services for SAP" in summary:
-                continue
-            if "real time" in title.lower() or "kernel-rt" in title.lower() or "kernel-rt" in summary.lower():
-                continue
-            
-            component = get_component_name(vendor, title, summary, full_text)
-            specific_ver = extract_specific_version(full_text, component, patch_id)
-            
-            # Extract diff content for history/summary
-            diff_content = extract_diff_content(full_text, vendor)
-            if not diff_content: diff_content = summary
-
-            # --- DIST VERSION EXTRACTION & SPLITTING ---
-            dist_versions = []
-            if vendor == "Ubuntu":
-                # Find all "XX.XX LTS" patterns and filter out EOL versions
-                lts_matches = re.findall(r"(\d{2}\.\d{2} LTS)", full_text + " " + title)
-                if lts_matches:
-                    active_lts = [v for v in sorted(set(lts_matches)) if v not in UBUNTU_EOL_LTS_VERSIONS]
-                    dist_versions = active_lts
-                # Non-LTS versions (25.10, etc.) are intentionally NOT included (not supported)
-            
-            elif vendor == "Oracle":
-                # Extracted in get_component_name, but let's formalize here
-                ol_ver = extract_oracle_version(full_text + " " + title) # e.g. "ol9"
-                if ol_ver:
-                    dist_versions = [ol_ver.replace("ol", "")] # "9"
-            
-            elif vendor == "Red Hat":
-                # Look for "Red Hat Enterprise Linux X"
-                rhel_matches = re.findall(r"Red Hat Enterprise Linux (\d+)", full_text)
-                if rhel_matches:
-                    dist_versions = sorted(list(set(rhel_matches)))
-            
-            if not dist_versions:
-                dist_versions = ["Unknown"]
-
-            # Log if we are splitting
-            if len(dist_versions) > 1:
-                print(f"Splitting {patch_id} into versions: {dist_versions}")
-
-            for dist_ver in dist_versions:
-                # Create a specific ID for this split if multiple
-                unique_id = patch_id
-                if len(dist_versions) > 1:
-                    unique_id = f"{patch_id}-{dist_ver.replace(' ','_')}"
-                
-                # Re-extract component/version specific to this dist_ver context if possible
-                # (For now, we use the global extraction but hint the Agent)
-                
-                # Attempt to extract detection specific to this Dist Version if provided
-                target_specific_ver = specific_ver
-                
-                if vendor == "Ubuntu":
-                   # Try to find the table row: "24.04 LTS noble runc – 1.3.3-..."
-                   # Regex look for: {dist_ver} ... {component} – {version}
-                   # escape dots in dist_ver
-                   safe_ver = re.escape(dist_ver)
-                   # Matches line like: "24.04 LTS noble runc – 1.3.3..."
-                   row_match = re.search(fr"{safe_ver}.*?{component}\s+[–-]\s+([^\s]+)", full_text, re.IGNORECASE)
-                   if row_match:
-                       target_specific_ver = row_match.group(1)
-
-                raw_list.append({
-                    'id': unique_id,
-                    'original_id': patch_id,
-                    'vendor': vendor,
-                    'dist_version': dist_ver,
-                    'date': date_str,
-                    'component': component,
-                    'specific_version': target_specific_ver,
-                    'summary': summary,
-                    'diff_content': diff_content, 
-                    'full_text': full_text + " " + title,
-                    'ref_url': data.get('url', '')
-                })
-
-        except Exception as e:
-            print(f"Error reading {json_path}: {e}")
-
-    print(f"Raw Patches: {len(raw_list)}")
-
-    # --- Step 2: Pruning ---
+                signature = (st.st_size, st.st_mtime_ns)
+                if done.get(json_path) == signature:
+                    continue
+                if pending.get(json_path) == signature:
+                    ready.append(json_path)
+                    done[json_path] = pending.pop(json_path)
+                else:
+                    # New or still being written: check again next poll
+                    pending[json_path] = signature
+            if ready or pending:
+                last_activity = time.monotonic()
+
+            if ready or changed:
+                to_ingest = filter_by_window(ready, window, report, prune=False) if window else ready
+                for json_path in set(ready) - set(to_ingest):
+                    changed.update((p.vendor, p.component) for p in pruned.pop(json_path, []))
+                with report.stage("ingest"):
+                    for json_path, records, error, stats in ingest_all(to_ingest, workers):
+                        report.count("advisory_files_parsed")
+                        if error is not None:
+                            # Marked done anyway: retried only if the file changes again
+                            report.count("ingest_errors")
+                            print(f"Error reading {json_path}: {error}")
+                            continue
+                        if stats['excluded_by']:
+                            report.count("excluded_advisories", rule=stats['excluded_by'])
+                        old = pruned.get(json_path, [])
+                        pruned[json_path] = prune_patches(records, report, exclusions, mark_exclusions)
+                        changed.update((p.vendor, p.component) for p in old + pruned[json_path])
+
+                with report.stage("aggregate_and_write"):
+                    grouped = group_patches([p for path in sorted(pruned) for p in pruned[path]])
+                    cve_index = build_cve_index(grouped)
+                    grouped = apply_baseline(grouped, baseline, baseline_path, output_file, report)
+                    count = write_output(grouped, cve_index, output_file, output_format,
+                                         shared_texts, token_budget, report, review_cache, near_duplicate_threshold)
+                groups = ", ".join(f"{vendor}/{component}" for vendor, component in sorted(changed)) or "none"
+                print(f"[WATCH] {len(ready)} new file(s), {len(removed)} removed; updated groups: {groups}. "
+                      f"{count} candidate(s) in {output_file}.")
+            elif idle_exit and time.monotonic() - last_activity >= idle_exit:
+                print(f"[WATCH] No new advisories for {idle_exit}s. Stopping.")
+                break
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        print("[WATCH] Stopped.")
+    return report
+
+def prune_patches(raw_list, report=None, exclusions=None, mark_exclusions=False):
+    """Keeps only the patches is_system_critical() accepts, counting drops per rule in report.
+
+    Patches an ExclusionIndex knows as already rejected are dropped too, or with
+    mark_exclusions kept with the matching entry in known_exclusion.
+    """
     pruned_list = []
     for p in raw_list:
-        if not is_system_critical(p['vendor'], p['component'], p['full_text']):
+        rule = prune_rule(p.vendor, p.component, lambda: p.full_text)
+        if rule:
+            if report: report.count("pruned_patches", rule=rule)
             continue
+        if exclusions is not None:
+            hit = exclusions.match(p)
+            if hit:
+                if report: report.count("known_exclusions", match=hit['match'])
+                if not mark_exclusions:
+                    if report: report.count("pruned_patches", rule="exclusion_index")
+                    continue
+                p.known_exclusion = hit
         pruned_list.append(p)
-        
-    print(f"Pruned Candidates: {len(pruned_list)}")
+    return pruned_list
+
+# Version segments: digit runs, letter runs, and the tilde/caret markers
+VERSION_SEGMENT_PATTERN = re.compile(r"~|\^|\d+|[A-Za-z]+")
+# Package name in front of a version ("kernel-5.14.0-..." / "fence-agents-4.2.1-...")
+VERSION_NAME_PREFIX = re.compile(r"^[A-Za-z][\w.+]*?-(?=\d)")
+
+@functools.lru_cache(maxsize=None)
+def version_key(version):
+    """Sort key with rpmvercmp/dpkg ordering for one version (or release) string.
+
+    Digit runs compare numerically and beat letter runs; separators only delimit;
+    a trailing "~" segment sorts before the bare version (1.0~rc1 < 1.0) and "^"
+    after it (1.0 < 1.0^git1), while any other extra segment makes it newer.
+    """
+    key = []
+    for seg in VERSION_SEGMENT_PATTERN.findall(version):
+        if seg == "~":
+            key.append((0,))
+        elif seg == "^":
+            key.append((2,))
+        elif seg.isdigit():
+            key.append((4, int(seg)))
+        else:
+            key.append((3, seg))
+    key.append((1,))  # end of string
+    return tuple(key)
+
+@functools.lru_cache(maxsize=None)
+def evr_key(specific_version):
+    """(epoch, version key, release key) of an RPM/Debian [name-][epoch:]version[-release] string."""
+    evr = VERSION_NAME_PREFIX.sub("", specific_version)
+    epoch = 0
+    m = re.match(r"(\d+):", evr)
+    if m:
+        epoch, evr = int(m.group(1)), evr[m.end():]
+    version, _, release = evr.rpartition("-") if "-" in evr else (evr, "", "")
+    return epoch, version_key(version), version_key(release)
+
+def patch_order_key(p, by_version):
+    """Newest sorts highest: EVR (when by_version), then date, then advisory ID compared naturally."""
+    return (evr_key(p.specific_version) if by_version else (),
+            advisory_store.date_key(p.date), version_key(p.id))
 
-    # --- Step 3: Aggregation ---
+def sort_group(group):
+    """Sorts a (vendor, component) group latest first.
+
+    Versions are only comparable within one dist version (Ubuntu 22.04 ships 5.15
+    kernels while 24.04 ships 6.8; RHEL 8 and 9 streams differ the same way), so the
+    group is ordered by date, then ID, and the patches of each dist version are then
+    reordered by EVR within the positions they hold. EVR ordering is only used when
+    every patch of that dist version has a specific_version (Red Hat versions mostly
+    come from manual overrides).
+    """
+    group.sort(key=lambda p: patch_order_key(p, False), reverse=True)
+    positions = {}
+    for i, p in enumerate(group):
+        positions.setdefault(p.dist_version, []).append(i)
+    for indexes in positions.values():
+        stream = [group[i] for i in indexes]
+        if len(stream) > 1 and all(p.specific_version for p in stream):
+            stream.sort(key=lambda p: patch_order_key(p, True), reverse=True)
+            for i, p in zip(indexes, stream):
+                group[i] = p
+
+def group_patches(pruned_list):
+    """Groups patches by (vendor, component), keeping first-seen group order. Each group is latest first."""
     grouped = {}
     for p in pruned_list:
         # Group by Vendor + Component (e.g. ('Oracle', 'kernel-uek-ol8'))
-        key = (p['vendor'], p['component'])
+        key = (p.vendor, p.component)
         if key not in grouped: grouped[key] = []
         grouped[key].append(p)
+    for group in grouped.values():
+        sort_group(group)
+    return grouped
 
-    final_candidates = []
-    
-    for key, group in grouped.items():
-        # Sort by ID descending (Latest first)
-        group.sort(key=lambda x: x['id'], reverse=True)
+def build_cve_index(grouped):
+    """Sets p.cves on every grouped patch and returns {cve: [(vendor, candidate_id, advisory_id)]}.
+
+    candidate_id is the lead of the group the advisory ended up in, so overlaps can be
+    reported between review candidates even when the CVE only appears in history.
+    """
+    index = {}
+    for (vendor, _), group in grouped.items():
+        candidate_id = group[0].id
+        for p in group:
+            if p.cves is None:
+                p.cves = extract_cves(p.diff_content, p.full_text)
+            for cve in p.cves:
+                index.setdefault(cve, []).append((vendor, candidate_id, p.id))
+    return index
+
+def cve_overlaps(lead, group, index):
+    """{other-vendor candidate id: [shared CVEs]} for every CVE anywhere in lead's group."""
+    overlaps = {}
+    for cve in sorted({cve for p in group for cve in p.cves}):
+        for vendor, candidate_id, _ in index.get(cve, []):
+            if vendor != lead.vendor:
+                shared = overlaps.setdefault(candidate_id, [])
+                if not shared or shared[-1] != cve:
+                    shared.append(cve)
+    return overlaps
+
+def write_cve_index(index, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({cve: [{'vendor': v, 'candidate': c, 'id': i} for v, c, i in entries]
+                   for cve, entries in sorted(index.items())}, f, indent=2, ensure_ascii=False)
+
+def text_segments(text, limit):
+    """Splits text into lines (keeping newlines); lines over limit are split into sentences."""
+    segments = []
+    for line in text.splitlines(keepends=True):
+        if len(line) <= limit:
+            segments.append(line)
+        else:
+            # Flattened Red Hat / Ubuntu text: "... (CVE-x) kernel: ..." or "... flaw. It ..."
+            segments.extend(re.split(r"(?<=[.!?)])(?=\s)", line))
+    return segments
+
+def trim_history_text(text, limit=HISTORY_SUMMARY_CHARS):
+    """Cuts text to at most limit chars, keeping lines that mention a CVE or a review keyword first.
+
+    The remaining room is filled with the other lines in text order; kept lines stay
+    in their original order.
+    """
+    if len(text) <= limit:
+        return text
+    segments = text_segments(text, limit)
+    important = [i for i, seg in enumerate(segments) if CVE_PATTERN.search(seg) or is_critical(seg)]
+    important_set = set(important)
+    chosen, room = [], limit
+    for i in important + [i for i in range(len(segments)) if i not in important_set]:
+        if len(segments[i]) <= room:
+            chosen.append(i)
+            room -= len(segments[i])
+    if not chosen:
+        return text[:limit]
+    return "".join(segments[i] for i in sorted(chosen))
+
+def history_entries(group, limit=HISTORY_SUMMARY_CHARS, folds=None):
+    """History context for the LLM: every older patch of the group, diff trimmed to limit.
+
+    In Oracle UEK groups each changelog entry is only listed under the newest patch
+    carrying it, so the room goes to the entries an older erratum adds. Patches
+    folded into a representative (folds, see near_duplicate_folds) get no entry of
+    their own; the representative lists them in near_duplicates.
+    """
+    folds = folds or {}
+    folded = {i for members in folds.values() for i, _ in members}
+    if not group[0].component.startswith("kernel-uek"):
+        return [HistoryEntry(id=old.id, date=old.date, diff_summary=trim_history_text(old.diff_content, limit),
+                             cves=old.cves, known_exclusion=old.known_exclusion,
+                             near_duplicates=near_duplicate_list(group, folds.get(i)))
+                for i, old in enumerate(group[1:], 1) if i not in folded]
+    seen = {entry.key for entry in parse_uek_changelog(group[0].diff_content)}
+    history = []
+    for i, old in enumerate(group[1:], 1):
+        # Folded errata still mark their entries as seen, like any newer erratum
+        unique, repeated = dedupe_uek_changelog(old.diff_content, seen)
+        if i in folded:
+            continue
+        history.append(HistoryEntry(id=old.id, date=old.date, diff_summary=trim_history_text(unique, limit),
+                                    cves=old.cves, repeated_entries=repeated, known_exclusion=old.known_exclusion,
+                                    near_duplicates=near_duplicate_list(group, folds.get(i))))
+    return history
+
+def estimate_tokens(cand):
+    """Token estimate of a candidate as it appears in the indented JSON packet."""
+    return len(json.dumps(cand.to_dict(), indent=2, ensure_ascii=False).encode('utf-8')) // BYTES_PER_TOKEN + 1
+
+def iter_review_candidates(grouped, cve_index=None, token_budget=None, near_duplicate_threshold=None, report=None):
+    """Yields one review candidate (the latest patch plus its history) per group.
+
+    Groups are popped as they are consumed, so a streaming writer only ever holds
+    the group it is currently serializing. With a cve_index (build_cve_index), the
+    lead carries its group's overlaps with other vendors' candidates. With a
+    token_budget, a candidate over budget gets shorter history summaries (halved
+    down to HISTORY_MIN_CHARS) until it fits. With a near_duplicate_threshold,
+    near-identical patches of a group are folded into one entry (near_duplicate_folds).
+    """
+    clusters = folded = 0
+    for key in list(grouped):
+        group = grouped.pop(key)
         latest = group[0]
+        folds = near_duplicate_folds(group, near_duplicate_threshold) if near_duplicate_threshold else {}
+        latest.near_duplicates = near_duplicate_list(group, folds.get(0))
+        clusters += len(folds)
+        folded += sum(len(members) for members in folds.values())
         
         # Prepare "History" context for the LLM
-        history_context = []
-        for old in group[1:]:
-            history_context.append({
-                'id': old['id'],
-                'date': old['date'],
-                'diff_summary': old['diff_content'][:800] # Provide diff content, truncated
-            })
-            
-        latest['history'] = history_context
+        history_context = history_entries(group, folds=folds)
+        latest.history = history_context
+        if cve_index is not None:
+            latest.cve_overlaps = cve_overlaps(latest, group, cve_index)
         
         review_note = ""
-        if latest['vendor'] == "Oracle": 
-            review_note = f"Verify this is UEK kernel ({latest['component']})."
-        
-        latest['review_instructions'] = f"Analyze this '{latest['component']}' patch ({review_note}). Check for System Hang, Data Loss, Boot Fail, or Critical Security. Merge insights from {len(history_context)} previous patches."
-        latest['patch_name_suggestion'] = latest['specific_version'] if latest['specific_version'] else latest['component']
-        
-        final_candidates.append(latest)
+        if latest.vendor == "Oracle": 
+            review_note = f"Verify this is UEK kernel ({latest.component})."
         
-    print(f"Final Candidates for LLM: {len(final_candidates)}")
-    
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(final_candidates, f, indent=2, ensure_ascii=False)
+        latest.review_instructions = f"Analyze this '{latest.component}' patch ({review_note}). Check for System Hang, Data Loss, Boot Fail, or Critical Security. Merge insights from {len(history_context)} previous patches."
+        if folds:
+            latest.review_instructions += " Entries listing near_duplicates stand for those advisories too; their verdict applies to each."
+        latest.patch_name_suggestion = latest.specific_version if latest.specific_version else latest.component
+
+        if token_budget:
+            limit = HISTORY_SUMMARY_CHARS
+            while history_context and limit > HISTORY_MIN_CHARS and estimate_tokens(latest) > token_budget:
+                limit //= 2
+                latest.history = history_entries(group, limit, folds)
         
-    print(f"Saved review packet to {OUTPUT_FILE}")
+        yield latest
+
+    if near_duplicate_threshold:
+        if report is not None:
+            report.count("near_duplicate_clusters", clusters)
+            report.count("near_duplicate_members", folded)
+        print(f"Near duplicates: {folded} patch(es) folded into {clusters} representative(s) within their groups.")
+
+def write_packet(candidates, path, output_format="json", shared_texts=False):
+    """Writes Patch candidates one at a time and returns how many were written.
+
+    "jsonl" writes one compact record per line. "json" writes the same bytes as
+    json.dump(list(candidates), f, indent=2), without building the list first.
+
+    With shared_texts, large text fields are replaced by {"text_ref": key} and each
+    distinct text is written once: as a {"text_ref", "text"} line ahead of the first
+    JSONL record using it, or in a "texts" table next to "candidates" for json.
+    """
+    count = 0
+    texts = {}
+    with open(path, 'w', encoding='utf-8') as f:
+        if output_format == "jsonl":
+            for cand in candidates:
+                cand = cand.to_dict()
+                if shared_texts:
+                    for key, text in share_texts(cand, texts):
+                        f.write(json.dumps({'text_ref': key, 'text': text}, ensure_ascii=False) + "\n")
+                f.write(json.dumps(cand, ensure_ascii=False) + "\n")
+                count += 1
+            return count
+
+        # Strings are escaped by json, so every raw newline is structural
+        prefix = "    " if shared_texts else "  "
+        if shared_texts:
+            f.write('{\n  "candidates": ')
+        for cand in candidates:
+            cand = cand.to_dict()
+            if shared_texts:
+                share_texts(cand, texts)
+            f.write("[\n" + prefix if count == 0 else ",\n" + prefix)
+            f.write(_indented_json(cand, prefix))
+            count += 1
+        f.write("\n" + prefix[:-2] + "]" if count else "[]")
+        if shared_texts:
+            f.write(',\n  "texts": ' + _indented_json(texts, "  ") + "\n}")
+    return count
+
+def shard_manifest_path(path):
+    return os.path.splitext(path)[0] + ".shards.json"
+
+def remove_stale_shards(path, keep=0):
+    """Deletes the shards of path numbered above keep, and the manifest when keep is 0."""
+    base, ext = os.path.splitext(path)
+    stale = [p for p in glob.glob(f"{glob.escape(base)}.[0-9][0-9][0-9]{ext}")
+             if int(p[len(base) + 1:len(p) - len(ext)]) > keep]
+    if not keep:
+        stale.append(shard_manifest_path(path))
+    for stale_path in stale:
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+
+def write_shards(candidates, path, token_budget, output_format="json", shared_texts=False, report=None):
+    """Writes candidates as packets of at most token_budget estimated tokens each.
+
+    Shards are numbered next to path (patches_for_llm_review.001.json, ...) and
+    filled in candidate order; a candidate (a whole group) is never split. A
+    candidate over budget on its own gets a shard to itself. The shard list goes to
+    a manifest (see shard_manifest_path) that perform_actual_review.py --input accepts.
+    Returns how many candidates were written.
+    """
+    base, ext = os.path.splitext(path)
+    shards = []
+    current, current_tokens = [], 0
+
+    def flush():
+        shard_path = f"{base}.{len(shards) + 1:03d}{ext}"
+        write_packet(iter(current), shard_path, output_format, shared_texts)
+        shards.append({'path': os.path.basename(shard_path), 'estimated_tokens': current_tokens,
+                       'candidates': [c.id for c in current]})
+
+    count = 0
+    for cand in candidates:
+        tokens = estimate_tokens(cand)
+        if tokens > token_budget:
+            print(f"Warning: {cand.id} ({cand.component}) alone is ~{tokens} tokens, over the {token_budget} budget.")
+            if report is not None:
+                report.count("oversize_candidates")
+        if current and current_tokens + tokens > token_budget:
+            flush()
+            current, current_tokens = [], 0
+        current.append(cand)
+        current_tokens += tokens
+        count += 1
+    if current:
+        flush()
+
+    with open(shard_manifest_path(path), 'w', encoding='utf-8') as f:
+        json.dump({'token_budget': token_budget, 'format': output_format, 'shards': shards},
+                  f, indent=2, ensure_ascii=False)
+    # A single packet or extra shards left by an earlier run must not be reviewed as current
+    remove_stale_shards(path, keep=len(shards))
+    if os.path.exists(path):
+        os.remove(path)
+    if report is not None:
+        report.count("packet_shards", len(shards))
+    print(f"Wrote {len(shards)} shard(s) of at most ~{token_budget} tokens; manifest: {shard_manifest_path(path)}")
+    return count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prune and aggregate batch_data advisories into the LLM review packet.")
+    parser.add_argument("--quarter", help="Only advisories of this quarter (YYYY-QN) plus the month before it, "
+                             "like batch_collector.js")
+    parser.add_argument("--days", type=int, help="Only advisories from the last N days (start snapped to the 1st "
+                             f"of the month), like batch_collector.js (default: {DEFAULT_LOOKBACK_DAYS})")
+    parser.add_argument("--all", action="store_true",
+                        help="Every advisory in batch_data/ regardless of its date, instead of the default "
+                             f"{DEFAULT_LOOKBACK_DAYS}-day window")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running behind batch_collector.js: ingest advisories as they are written "
+                             "and rewrite the packet after each batch")
+    parser.add_argument("--poll", type=float, default=WATCH_POLL_SECONDS,
+                        help=f"--watch polling interval in seconds (default: {WATCH_POLL_SECONDS})")
+    parser.add_argument("--idle-exit", type=float,
+                        help="--watch: stop after this many seconds without new advisories (default: run until Ctrl-C)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used to parse advisories (default: 1 = serial)")
+    parser.add_argument("--cache", default=INGEST_CACHE_FILE,
+                        help=f"Ingest cache file (default: {INGEST_CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse every advisory and do not read or write the ingest cache")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json",
+                        help="Review packet format: one indented JSON array (default) or JSON Lines")
+    parser.add_argument("--shared-texts", action="store_true",
+                        help="Write each large text once in a shared 'texts' table and reference it from records")
+    parser.add_argument("--db", help="Use a SQLite advisory store (e.g. advisories.db): sync batch_data into it, "
+                             "then read patches with indexed queries instead of the ingest cache")
+    parser.add_argument("--ingest-only", action="store_true", help="With --db: only load batch_data into the store")
+    parser.add_argument("--vendor", action="append", help="With --db: only these vendors (repeatable)")
+    parser.add_argument("--component", action="append", help="With --db: only these components (repeatable)")
+    parser.add_argument("--since", help="With --db: first date to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="With --db: first date to exclude (YYYY-MM-DD)")
+    parser.add_argument("--token-budget", type=int,
+                        help="Split the packet into shards of at most this many (estimated) tokens each; "
+                             "groups are never split")
+    parser.add_argument("--review-cache", help="Annotate advisories already scored in this perform_actual_review.py "
+                                               "--review-cache file with their cached verdict")
+    parser.add_argument("--baseline", help="Previous final report (CSV or JSON rows): only groups that are new "
+                                           "or have a newer critical advisory go into the packet")
+    parser.add_argument("--exclusions", help="Drop patches this exclusion_index.py index knows as already rejected")
+    parser.add_argument("--mark-exclusions", action="store_true",
+                        help="With --exclusions: keep known exclusions in the packet, marked with known_exclusion")
+    parser.add_argument("--cluster-near-duplicates", type=float, nargs="?", const=near_duplicates.THRESHOLD,
+                        metavar="SIMILARITY",
+                        help="Within each group, fold near-identical patches (EUS/AUS variants, Ubuntu split rows) "
+                             "into the newest one, which lists the others in near_duplicates and whose verdict "
+                             f"they share (MinHash similarity of diff_content, default {near_duplicates.THRESHOLD})")
+    parser.add_argument("--cve-index", help="Also write the CVE -> advisories inverted index to this JSON file")
+    parser.add_argument("--report", help="Write a JSON run report (stage timings, exclusion counts, slowest advisories)")
+    parser.add_argument("--prometheus", help="Write the run report in Prometheus text format to this file")
+    args = parser.parse_args(argv)
+    if args.all and (args.quarter or args.days):
+        parser.error("--all cannot be combined with --quarter or --days")
+    return args
 
 if __name__ == "__main__":
-    preprocess_patches()
+    args = parse_args()
+    window = None
+    if not args.all:
+        # Like batch_collector.js, no --quarter/--days means the last DEFAULT_LOOKBACK_DAYS days
+        try:
+            window = date_window(args.quarter, args.days)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    review_cache = ReviewCache(args.review_cache, review_rules_fingerprints()) if args.review_cache else None
+    exclusions = ExclusionIndex(args.exclusions) if args.exclusions else None
+    if args.watch:
+        report = watch_patches(workers=max(1, args.workers), output_format=args.format,
+                               shared_texts=args.shared_texts, window=window, token_budget=args.token_budget,
+                               poll_seconds=args.poll, idle_exit=args.idle_exit, review_cache=review_cache,
+                               baseline_path=args.baseline, exclusions=exclusions,
+                               mark_exclusions=args.mark_exclusions,
+                               near_duplicate_threshold=args.cluster_near_duplicates)
+        report.save(args.report, args.prometheus)
+        sys.exit(0)
+    report = preprocess_patches(workers=max(1, args.workers),
+                                cache_path=None if args.no_cache else args.cache,
+                                output_format=args.format,
+                                shared_texts=args.shared_texts,
+                                db_path=args.db,
+                                query={'vendors': args.vendor, 'components': args.component,
+                                       'since': args.since, 'until': args.until,
+                                       'ingest_only': args.ingest_only},
+                                cve_index_path=args.cve_index,
+                                window=window,
+                                token_budget=args.token_budget,
+                                review_cache=review_cache,
+                                baseline_path=args.baseline,
+                                exclusions=exclusions,
+                                mark_exclusions=args.mark_exclusions,
+                                near_duplicate_threshold=args.cluster_near_duplicates)
+    report.save(args.report, args.prometheus)
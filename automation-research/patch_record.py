@@ -0,0 +1,181 @@
+"""Compact record types shared by patch_preprocessing.py and perform_actual_review.py.
+
+The review packet stays plain JSON: every record converts to and from exactly the
+dicts the scripts used before (same keys, same key order), so packets written by
+older versions still load and new packets are byte-identical.
+"""
+import re
+
+CVE_PATTERN = re.compile(r"CVE-\d{4}-\d{4,7}")
+
+# Fields every ingested advisory carries, in packet key order
+PATCH_FIELDS = (
+    'id', 'original_id', 'vendor', 'dist_version', 'date', 'component',
+    'specific_version', 'summary', 'diff_content', 'full_text', 'ref_url',
+)
+# Fields only set on the lead of a group when the packet is built
+PACKET_FIELDS = ('history', 'review_instructions', 'patch_name_suggestion', 'cves', 'cve_overlaps', 'cached_verdict',
+                 'known_exclusion', 'near_duplicates')
+
+
+def extract_cves(*texts):
+    """Sorted unique CVE IDs mentioned in texts."""
+    found = set()
+    for text in texts:
+        found.update(CVE_PATTERN.findall(text))
+    return sorted(found)
+
+
+class HistoryEntry:
+    """An older patch of a group, summarized for the reviewer."""
+    __slots__ = ('id', 'date', 'diff_summary', 'cves', 'cached_verdict', 'repeated_entries', 'known_exclusion',
+                 'near_duplicates')
+
+    def __init__(self, id, date, diff_summary='', cves=None, cached_verdict=None, repeated_entries=None,
+                 known_exclusion=None, near_duplicates=None):
+        self.id = id
+        self.date = date
+        self.diff_summary = diff_summary
+        self.cves = cves
+        self.cached_verdict = cached_verdict
+        # Oracle UEK: changelog entries left out of diff_summary because a newer patch lists them
+        self.repeated_entries = repeated_entries
+        # exclusion_index.py entry that rejected this advisory before (--mark-exclusions)
+        self.known_exclusion = known_exclusion
+        # Older patches of the group folded into this one (--cluster-near-duplicates)
+        self.near_duplicates = near_duplicates
+
+    def to_dict(self):
+        d = {'id': self.id, 'date': self.date, 'diff_summary': self.diff_summary}
+        if self.cves is not None:
+            d['cves'] = self.cves
+        if self.repeated_entries is not None:
+            d['repeated_entries'] = self.repeated_entries
+        if self.cached_verdict is not None:
+            d['cached_verdict'] = self.cached_verdict
+        if self.known_exclusion is not None:
+            d['known_exclusion'] = self.known_exclusion
+        if self.near_duplicates is not None:
+            d['near_duplicates'] = self.near_duplicates
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['id'], d['date'], d.get('diff_summary', ''), d.get('cves'), d.get('cached_verdict'),
+                   d.get('repeated_entries'), d.get('known_exclusion'), d.get('near_duplicates'))
+
+
+class ChangelogEntry:
+    """One '- subject (author) [Orabug: N] {CVE-...}' line of an Oracle UEK changelog."""
+    __slots__ = ('version', 'subject', 'author', 'orabugs', 'cves')
+
+    def __init__(self, version, subject, author='', orabugs=None, cves=None):
+        self.version = version
+        self.subject = subject
+        self.author = author
+        self.orabugs = orabugs or []
+        self.cves = cves or []
+
+    @property
+    def key(self):
+        """Identity across errata: the same fix is backported under new versions and Orabug IDs."""
+        return (self.subject, self.author)
+
+    def to_dict(self):
+        return {'version': self.version, 'subject': self.subject, 'author': self.author,
+                'orabugs': self.orabugs, 'cves': self.cves}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['version'], d['subject'], d.get('author', ''), d.get('orabugs'), d.get('cves'))
+
+
+class Patch:
+    """One advisory for one dist version (an entry of raw_list / a packet candidate).
+
+    full_text may be left on disk: a record with full_text None and a source path
+    loads it through Patch.text_loader on first access and keeps it, so only the
+    records that need it (pruning fallback, packet writer) pay for it.
+    """
+    __slots__ = tuple(f for f in PATCH_FIELDS if f != 'full_text') + ('_full_text', 'source') + PACKET_FIELDS
+
+    # source path -> full_text; set by patch_preprocessing
+    text_loader = None
+
+    def __init__(self, id, original_id, vendor, dist_version, date, component,
+                 specific_version='', summary='', diff_content='', full_text='', ref_url='', source=None):
+        self.id = id
+        self.original_id = original_id
+        self.vendor = vendor
+        self.dist_version = dist_version
+        self.date = date
+        self.component = component
+        self.specific_version = specific_version
+        self.summary = summary
+        self.diff_content = diff_content
+        self._full_text = full_text
+        self.ref_url = ref_url
+        self.source = source
+        self.history = None
+        self.review_instructions = None
+        self.patch_name_suggestion = None
+        self.cves = None
+        self.cve_overlaps = None
+        self.cached_verdict = None
+        self.known_exclusion = None
+        self.near_duplicates = None
+
+    @property
+    def full_text(self):
+        if self._full_text is None:
+            self._full_text = Patch.text_loader(self.source)
+        return self._full_text
+
+    @full_text.setter
+    def full_text(self, value):
+        self._full_text = value
+
+    @property
+    def full_text_loaded(self):
+        return self._full_text is not None
+
+    def to_dict(self, lazy=False):
+        """Packet/cache dict. With lazy, an unloaded full_text is written as its 'source' path."""
+        if lazy and self._full_text is None:
+            d = {field: getattr(self, field) for field in PATCH_FIELDS if field != 'full_text'}
+            d['source'] = self.source
+        else:
+            d = {field: getattr(self, field) for field in PATCH_FIELDS}
+        if self.history is not None:
+            d['history'] = [h.to_dict() for h in self.history]
+        for field in PACKET_FIELDS[1:]:
+            value = getattr(self, field)
+            if value is not None:
+                d[field] = value
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        patch = cls(**{field: d.get(field, '') for field in PATCH_FIELDS})
+        if 'full_text' not in d and d.get('source'):
+            patch.full_text, patch.source = None, d['source']
+        if 'history' in d:
+            patch.history = [HistoryEntry.from_dict(h) for h in d['history']]
+        for field in PACKET_FIELDS[1:]:
+            setattr(patch, field, d.get(field))
+        return patch
+
+
+class ReviewCandidate:
+    """A lead or history entry being scored in perform_actual_review.process_review()."""
+    __slots__ = ('id', 'date', 'version', 'impacts', 'is_critical', 'obj', 'full_text', 'sentences')
+
+    def __init__(self, id, date, version, impacts, obj, full_text, sentences):
+        self.id = id
+        self.date = date
+        self.version = version
+        self.impacts = impacts
+        self.is_critical = len(impacts) > 0
+        self.obj = obj
+        self.full_text = full_text
+        self.sentences = sentences
@@ -3,10 +3,23 @@ import csv
 import re
 import sys
 import os
+import time
+import hashlib
+import io
+import argparse
+import contextlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from patch_record import Patch, ReviewCandidate, CVE_PATTERN
+from run_report import RunReport
+import report_delta
+from review_cache import ReviewCache, DEFAULT_CACHE as REVIEW_CACHE_FILE
 
 # Input file is expected in the same directory
 INPUT_FILE = "patches_for_llm_review.json"
 OUTPUT_FILE = "patch_review_final_report.csv"
+REPORT_FIELDS = ["Issue ID", "Vendor", "Dist Version", "Component", "Version", "Date", "Criticality", "Patch Description", "한글 설명", "Reference"]
 
 # Keywords to identify "Critical" impact
 CRITICAL_KEYWORDS = {
@@ -17,37 +30,152 @@ CRITICAL_KEYWORDS = {
     "Service Outage": ["denial of service", "dos", "segfault", "segmentation fault", "memory leak", "out of memory", "oom"]
 }
 
+# --workers: groups per task sent to a scoring process, and tasks queued per worker at a time
+REVIEW_CHUNKSIZE = 4
+REVIEW_BATCH_CHUNKS = 4
+
+# When True, keywords only match whole words ("dos" no longer hits "windows",
+# "boot" no longer hits "reboot"). Set from --word-boundary.
+WORD_BOUNDARY_MATCHING = False
+
+KEYWORD_CATEGORY = {kw: cat for cat, kws in CRITICAL_KEYWORDS.items() for kw in kws}
+# Keywords that are prefixes of a longer keyword. A lookahead match at a position
+# reports only the longest alternative, so the shorter ones are checked from here.
+KEYWORD_PREFIXES = {
+    kw: [other for other in KEYWORD_CATEGORY if other != kw and kw.startswith(other)]
+    for kw in KEYWORD_CATEGORY
+}
+
+def build_keyword_pattern(word_boundary):
+    """One regex that walks a text once, yielding sentence breaks and keyword hits.
+
+    Sentence breaks mirror the old re.split(r'(?<=[.!?])\\s+') boundaries. Keyword
+    hits are zero-width lookaheads so overlapping keywords are all seen.
+    """
+    alts = "|".join(re.escape(kw) for kw in sorted(KEYWORD_CATEGORY, key=len, reverse=True))
+    if word_boundary:
+        kw_expr = fr"(?=\b(?P<kw>{alts})\b)"
+    else:
+        kw_expr = fr"(?=(?P<kw>{alts}))"
+    return re.compile(fr"(?P<brk>(?<=[.!?])\s+)|{kw_expr}", re.IGNORECASE)
+
+KEYWORD_PATTERNS = {False: build_keyword_pattern(False), True: build_keyword_pattern(True)}
+
+def scan_keywords(text, word_boundary=None):
+    """Single pass over text. Returns (impact categories, sentences containing a keyword).
+
+    Categories follow CRITICAL_KEYWORDS order; sentences are stripped, de-duplicated
+    and in text order.
+    """
+    if word_boundary is None:
+        word_boundary = WORD_BOUNDARY_MATCHING
+    categories = set()
+    sentences = []
+    seen = set()
+    sent_start = 0
+    sent_hit = False
+
+    def close_sentence(end):
+        clean_s = text[sent_start:end].strip()
+        if clean_s not in seen:
+            sentences.append(clean_s)
+            seen.add(clean_s)
+
+    for m in KEYWORD_PATTERNS[word_boundary].finditer(text):
+        if m.group('brk') is not None:
+            if sent_hit:
+                close_sentence(m.start())
+            sent_start = m.end()
+            sent_hit = False
+            continue
+        kw = m.group('kw').lower()
+        sent_hit = True
+        categories.add(KEYWORD_CATEGORY[kw])
+        for short in KEYWORD_PREFIXES[kw]:
+            end = m.start() + len(short)
+            if word_boundary and end < len(text) and (text[end].isalnum() or text[end] == '_'):
+                continue
+            categories.add(KEYWORD_CATEGORY[short])
+    if sent_hit:
+        close_sentence(len(text))
+
+    return [cat for cat in CRITICAL_KEYWORDS if cat in categories], sentences
+
+def review_rules_fingerprint(word_boundary=None, dedupe_cves=False):
+    """Hash of everything a verdict depends on besides the text; see review_cache.py."""
+    if word_boundary is None:
+        word_boundary = WORD_BOUNDARY_MATCHING
+    return hashlib.sha256(json.dumps([CRITICAL_KEYWORDS, word_boundary, dedupe_cves]).encode('utf-8')).hexdigest()
+
+def review_rules_fingerprints():
+    """Fingerprints of the current keyword table under every matching option.
+
+    patch_preprocessing.py has no say in how the reviewer matches, so it accepts a
+    cache written with any of them, as long as the keyword table is the current one.
+    """
+    return [review_rules_fingerprint(word_boundary, dedupe_cves)
+            for word_boundary in (False, True) for dedupe_cves in (False, True)]
+
 def is_critical(text):
-    text = text.lower()
-    found_impacts = []
-    
-    for category, keywords in CRITICAL_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text:
-                found_impacts.append(category)
-    return list(set(found_impacts))
+    return scan_keywords(text)[0]
 
 def extract_key_sentence(text):
     """Extracts sentences containing critical keywords."""
-    # Split by sentence boundaries (roughly)
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    matches = []
-    seen = set()
-    
-    for s in sentences:
-        s_lower = s.lower()
-        found = False
-        for cat, kws in CRITICAL_KEYWORDS.items():
-            for k in kws:
-                if k in s_lower:
-                    clean_s = s.strip()
-                    if clean_s not in seen:
-                        matches.append(clean_s)
-                        seen.add(clean_s)
-                    found = True
-                    break
-            if found: break
-    return matches
+    return scan_keywords(text)[1]
+
+def cve_contexts(text):
+    """Yields (cve, start, end) for every CVE mention in text.
+
+    A mention's context is its own line, cut at the previous CVE mention (flattened
+    Red Hat lists, Ubuntu "... (CVE-x)" paragraphs).
+    """
+    prev_end = 0
+    for m in CVE_PATTERN.finditer(text):
+        start = max(prev_end, text.rfind("\n", 0, m.start()) + 1)
+        yield m.group(), start, m.end()
+        prev_end = m.end()
+
+def learn_cve_verdicts(contexts, text, verdicts):
+    """Scores each CVE in contexts that has no verdict yet, as (impacts, sentences).
+
+    All mentions of a CVE in the text count, so a bare "Related CVEs:" line does not
+    hide its changelog entry.
+    """
+    windows = {}
+    for cve, start, end in contexts:
+        if cve not in verdicts:
+            windows.setdefault(cve, []).append(text[start:end])
+    for cve, texts in windows.items():
+        verdicts[cve] = merge_scans(scan_keywords(t) for t in texts)
+
+def merge_scans(scans):
+    impacts, sentences = set(), []
+    for s_impacts, s_sentences in scans:
+        impacts.update(s_impacts)
+        sentences.extend(s_sentences)
+    return [cat for cat in CRITICAL_KEYWORDS if cat in impacts], list(dict.fromkeys(sentences))
+
+def scan_with_cve_verdicts(text, verdicts, stats):
+    """scan_keywords() that reuses CVE verdicts from earlier candidates (any vendor).
+
+    When every CVE in text already has a verdict, only the text outside the CVE
+    contexts (headers, package lists, non-CVE fixes) is scanned and the verdicts are
+    merged in. Other texts are scanned in full and their new CVEs are scored for
+    later candidates.
+    """
+    contexts = list(cve_contexts(text))
+    if contexts and all(cve in verdicts for cve, _, _ in contexts):
+        stats["reused"] += 1
+        rest, pos = [], 0
+        for _, start, end in contexts:
+            rest.append(text[pos:start])
+            pos = end
+        rest.append(text[pos:])
+        known = dict.fromkeys(cve for cve, _, _ in contexts)
+        return merge_scans([scan_keywords(" ".join(rest))] + [verdicts[cve] for cve in known])
+    stats["scanned"] += 1
+    learn_cve_verdicts(contexts, text, verdicts)
+    return scan_keywords(text)
 
 def generate_korean_desc(patch_id, impacts, is_cumulative, history_count):
     # Fallback template
@@ -191,120 +319,389 @@ BEST_PRACTICE_DESCS = {
     }
 }
 
-def process_review():
-    print(f"Loading {INPUT_FILE}...")
-    try:
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+def resolve_texts(item, texts):
+    """Replaces {"text_ref": key} fields of item and its history with the shared text."""
+    for entry in [item] + item.get('history', []):
+        for field, value in entry.items():
+            if isinstance(value, dict) and 'text_ref' in value:
+                entry[field] = texts[value['text_ref']]
+    return item
+
+def iter_packet(path, input_format=None):
+    """Yields review candidates from a packet file.
+
+    JSON Lines packets (.jsonl or input_format="jsonl") are read one record at a
+    time; the legacy indented JSON array is loaded whole. Packets written with
+    --shared-texts are resolved against their texts table as each record is yielded.
+    A shard manifest (--token-budget) yields the candidates of every shard in order.
+    """
+    if input_format is None or path.endswith(".shards.json"):
+        input_format = "jsonl" if path.endswith(".jsonl") else "json"
+    texts = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        if input_format == "jsonl":
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if 'text' in record and 'text_ref' in record:
+                    texts[record['text_ref']] = record['text']
+                    continue
+                yield resolve_texts(record, texts)
+        else:
             data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: {INPUT_FILE} not found in {os.getcwd()}")
-        return
+            if isinstance(data, dict) and 'shards' in data:
+                for shard in data['shards']:
+                    yield from iter_packet(os.path.join(os.path.dirname(path), shard['path']), data.get('format'))
+                return
+            if isinstance(data, dict):
+                texts = data.get('texts', {})
+                data = data.get('candidates', [])
+            for item in data:
+                yield resolve_texts(item, texts)
 
-    final_rows = []
+def lead_texts(item):
+    """The texts a lead is scored on: (full text + summary, diff). Also the review cache key."""
+    return item.full_text + " " + item.summary, item.diff_content
+
+def review_item(item, cve_verdicts=None, cve_stats=None, cache=None):
+    """Scores one packet candidate (a Patch with history) and returns its CSV row, or None if nothing is critical.
+
+    cve_verdicts, when given, is a {cve: (impacts, sentences)} dict shared across the run
+    (see scan_with_cve_verdicts) and cve_stats its {"reused", "scanned"} text counts.
+    With a ReviewCache, advisories whose text was scored before are not scanned again.
+    """
+    if cve_verdicts is None:
+        scan = scan_keywords
+    else:
+        if cve_stats is None:
+            cve_stats = {"reused": 0, "scanned": 0}
+        scan = lambda text: scan_with_cve_verdicts(text, cve_verdicts, cve_stats)
+
+    entries = {}
+    def verdict(advisory_id, texts, compute):
+        if cache is None:
+            return compute()
+        entry = cache.get(advisory_id, texts)
+        if entry is None:
+            entry = cache.put(advisory_id, texts, *compute())
+        entries[advisory_id] = entry
+        return entry['impacts'], entry['sentences']
+
+    def score_lead():
+        lead_impacts, lead_sentences = scan(lead_text)
+        diff_impacts = scan(item.diff_content)[0]
+        return [cat for cat in CRITICAL_KEYWORDS if cat in lead_impacts or cat in diff_impacts], lead_sentences
+
+    # Lead item represents the "Latest" physical update.
+    # Each text is scanned once; the sentences are kept for aggregation below.
+    lead_text = lead_texts(item)[0]
+    lead_impacts, lead_sentences = verdict(item.id, lead_texts(item), score_lead)
     
-    for item in data:
-        # Lead item represents the "Latest" physical update.
-        lead_impacts = is_critical(item['full_text'] + " " + item['summary'] + " " + item.get('diff_content', ''))
-        
-        candidates = []
-        # Add Lead
-        candidates.append({
-            'id': item['id'],
-            'date': item['date'],
-            'version': item.get('specific_version', item['component']),
-            'impacts': lead_impacts,
-            'is_critical': len(lead_impacts) > 0,
-            'obj': item,
-            'full_text': item['full_text'] + " " + item['summary']
-        })
-        
-        # Add History
-        for hist in item.get('history', []):
-            h_text = hist.get('diff_summary', '')
-            h_impacts = is_critical(h_text)
-            candidates.append({
-                'id': hist['id'],
-                'date': hist['date'],
-                'version': item.get('specific_version', item['component']) + " (Old)",
-                'impacts': h_impacts,
-                'is_critical': len(h_impacts) > 0,
-                'obj': hist,
-                'full_text': h_text
-            })
-            
-        # Candidates are roughly sorted by date descending (Lead is newest).
-        # Strategy: Iterate from top. Find first CRITICAL item.
-        
-        selected_cand = None
-        selected_idx = -1
-        
-        for i, cand in enumerate(candidates):
-            if cand['is_critical']:
-                selected_cand = cand
-                selected_idx = i
-                break
-        
-        if not selected_cand:
-            # No critical version found in this group. Skip.
-            print(f"Skipping {item['component']} ({item['id']}): No critical impact found.")
-            # Depending on business rule, we might keep it if it fixes *something*, but SKILL says "Criteria for Inclusion".
-            continue
-            
-        # If we selected Index 2 (older), we ignore Index 0 and 1.
-        # We aggregate descriptions from Index 2 downwards (if they are also critical).
-        
-        critical_subset = [c for c in candidates[selected_idx:] if c['is_critical']]
-        
-        # Aggregate logic
-        agg_impacts = set()
-        agg_sentences = []
-        
-        for c in critical_subset:
-            agg_impacts.update(c['impacts'])
-            sents = extract_key_sentence(c['full_text'])
-            agg_sentences.extend(sents)
-            
-        # De-dupe sentences
-        unique_sentences = list(dict.fromkeys(agg_sentences))
-        
-        # Count for "Cumulative" tag
-        is_cumulative = len(critical_subset) > 1
-        
-        # Generate Descriptions
-        # Note: history_count is purely for the tag "(누적 패치 포함: N건)"
-        history_count = len(critical_subset)
-        
-        ko_desc = BEST_PRACTICE_DESCS.get(selected_cand['id'], {}).get("ko")
-        en_desc = BEST_PRACTICE_DESCS.get(selected_cand['id'], {}).get("en")
+    candidates = []
+    def add_near_duplicates(rep):
+        # Folded in by patch_preprocessing.py --cluster-near-duplicates: they share rep's verdict unscanned
+        for member in rep.obj.near_duplicates or []:
+            candidates.append(ReviewCandidate(
+                id=member['id'],
+                date=member['date'],
+                version=member['specific_version'] or rep.version,
+                impacts=rep.impacts,
+                obj=rep.obj,
+                full_text=rep.full_text,
+                sentences=rep.sentences
+            ))
+
+    # Add Lead
+    candidates.append(ReviewCandidate(
+        id=item.id,
+        date=item.date,
+        version=item.specific_version,
+        impacts=lead_impacts,
+        obj=item,
+        full_text=lead_text,
+        sentences=lead_sentences
+    ))
+    add_near_duplicates(candidates[-1])
+    
+    # Add History
+    for hist in item.history or []:
+        h_text = hist.diff_summary
+        h_impacts, h_sentences = verdict(hist.id, (h_text,), lambda: scan(h_text))
+        candidates.append(ReviewCandidate(
+            id=hist.id,
+            date=hist.date,
+            version=item.specific_version + " (Old)",
+            impacts=h_impacts,
+            obj=hist,
+            full_text=h_text,
+            sentences=h_sentences
+        ))
+        add_near_duplicates(candidates[-1])
         
-        if not ko_desc:
-            ko_desc = generate_korean_desc(selected_cand['id'], list(agg_impacts), is_cumulative, history_count)
-        if not en_desc:
-            en_desc = generate_english_desc(selected_cand['id'], list(agg_impacts), is_cumulative)
+    # Candidates are roughly sorted by date descending (Lead is newest).
+    # Strategy: Iterate from top. Find first CRITICAL item.
+    
+    selected_cand = None
+    selected_idx = -1
+    
+    for i, cand in enumerate(candidates):
+        # Advisories marked by patch_preprocessing.py --mark-exclusions were rejected before
+        if cand.is_critical and cand.obj.known_exclusion is None:
+            selected_cand = cand
+            selected_idx = i
+            break
+    
+    if not selected_cand:
+        # No critical version found in this group. Skip.
+        print(f"Skipping {item.component} ({item.id}): No critical impact found.")
+        # Depending on business rule, we might keep it if it fixes *something*, but SKILL says "Criteria for Inclusion".
+        return None
         
-        row = {
-            "Issue ID": selected_cand['id'],
-            "Vendor": item['vendor'],
-            "Dist Version": item.get('dist_version', ''),
-            "Component": item['component'],
-            "Version": item.get('specific_version', ''),
-            "Date": selected_cand['date'],
-            "Criticality": "Critical",
-            "Patch Description": en_desc,
-            "한글 설명": ko_desc,
-            "Reference": item.get('ref_url', '')
-        }
-        final_rows.append(row)
-        print(f"Added {selected_cand['id']} ({item['component']}) - Critical: {list(agg_impacts)}")
-
-    # Write CSV
-    with open(OUTPUT_FILE, 'w', encoding='utf-8-sig', newline='') as f:
-        fieldnames = ["Issue ID", "Vendor", "Dist Version", "Component", "Version", "Date", "Criticality", "Patch Description", "한글 설명", "Reference"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(final_rows)
+    # If we selected Index 2 (older), we ignore Index 0 and 1.
+    # We aggregate descriptions from Index 2 downwards (if they are also critical).
+    
+    critical_subset = [c for c in candidates[selected_idx:] if c.is_critical]
+    
+    # Aggregate logic
+    agg_impacts = set()
+    agg_sentences = []
+    
+    for c in critical_subset:
+        agg_impacts.update(c.impacts)
+        agg_sentences.extend(c.sentences)
         
+    # De-dupe sentences
+    unique_sentences = list(dict.fromkeys(agg_sentences))
+    
+    # Count for "Cumulative" tag
+    is_cumulative = len(critical_subset) > 1
+    
+    # Generate Descriptions
+    # Note: history_count is purely for the tag "(누적 패치 포함: N건)"
+    history_count = len(critical_subset)
+    
+    ko_desc = BEST_PRACTICE_DESCS.get(selected_cand.id, {}).get("ko")
+    en_desc = BEST_PRACTICE_DESCS.get(selected_cand.id, {}).get("en")
+    
+    if not ko_desc:
+        ko_desc = generate_korean_desc(selected_cand.id, list(agg_impacts), is_cumulative, history_count)
+    if not en_desc:
+        en_desc = generate_english_desc(selected_cand.id, list(agg_impacts), is_cumulative)
+
+    entry = entries.get(selected_cand.id)
+    if entry is not None:
+        # A reviewer's edited description sticks to this advisory until its text changes
+        imported = cache.imported_overrides.get(selected_cand.id)
+        if imported and (imported['en'], imported['ko']) != (en_desc, ko_desc):
+            entry['override'] = imported
+        entry['en'], entry['ko'] = en_desc, ko_desc
+        override = entry.get('override')
+        if override:
+            en_desc, ko_desc = override['en'], override['ko']
+    
+    row = {
+        "Issue ID": selected_cand.id,
+        "Vendor": item.vendor,
+        "Dist Version": item.dist_version,
+        "Component": item.component,
+        "Version": item.specific_version,
+        "Date": selected_cand.date,
+        "Criticality": "Critical",
+        "Patch Description": en_desc,
+        "한글 설명": ko_desc,
+        "Reference": item.ref_url
+    }
+    print(f"Added {selected_cand.id} ({item.component}) - Critical: {list(agg_impacts)}")
+    return row
+
+def score_item(item, cve_verdicts=None, cve_stats=None, cache=None):
+    """Reviews one packet dict. Returns (id, row or None, seconds, text size, history count)."""
+    item = Patch.from_dict(item)
+    start = time.perf_counter()
+    row = review_item(item, cve_verdicts, cve_stats, cache)
+    size = len(item.full_text) + sum(len(h.diff_summary) for h in item.history or [])
+    return item.id, row, time.perf_counter() - start, size, len(item.history or [])
+
+def _init_review_worker(word_boundary):
+    global WORD_BOUNDARY_MATCHING
+    WORD_BOUNDARY_MATCHING = word_boundary
+
+def _review_worker(item):
+    """Process pool entry point. The decision log is returned so the parent prints it in input order."""
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        result = score_item(item)
+    return result, log.getvalue()
+
+def score_all(items, workers=1, cve_verdicts=None, cve_stats=None, cache=None):
+    """Yields score_item() results in input order, fanning groups out to a process pool when workers > 1.
+
+    The pool is fed in batches of REVIEW_BATCH_CHUNKS chunks per worker, so a streamed
+    packet is never held in memory whole; the next batch is submitted before the
+    current one is yielded, which keeps the workers busy.
+    """
+    items = iter(items)
+    head = list(itertools.islice(items, 2))
+    items = itertools.chain(head, items)
+    if workers > 1 and len(head) > 1:
+        batch_size = workers * REVIEW_BATCH_CHUNKS * REVIEW_CHUNKSIZE
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_review_worker,
+                                 initargs=(WORD_BOUNDARY_MATCHING,)) as pool:
+            pending = None
+            while True:
+                batch = list(itertools.islice(items, batch_size))
+                submitted = pool.map(_review_worker, batch, chunksize=REVIEW_CHUNKSIZE) if batch else None
+                if pending is not None:
+                    for result, log in pending:
+                        sys.stdout.write(log)
+                        yield result
+                if submitted is None:
+                    break
+                pending = submitted
+    else:
+        for item in items:
+            yield score_item(item, cve_verdicts, cve_stats, cache)
+
+def load_overrides(csv_path):
+    """{Issue ID: {'en', 'ko'}} descriptions from a (reviewer-edited) final report CSV."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        return {row["Issue ID"]: {'en': row["Patch Description"], 'ko': row["한글 설명"]}
+                for row in csv.DictReader(f)}
+
+def process_review(input_file=INPUT_FILE, input_format=None, report=None, dedupe_cves=False, workers=1,
+                   cache_path=None, overrides_csv=None, cache_max_bytes=None, baseline_path=None):
+    if report is None:
+        report = RunReport("perform_actual_review")
+    print(f"Loading {input_file}...")
+    if not os.path.exists(input_file):
+        print(f"Error: {input_file} not found in {os.getcwd()}")
+        return report
+
+    final_rows = []
+    cve_verdicts = {} if dedupe_cves else None
+    cve_stats = {"reused": 0, "scanned": 0}
+    cache = None
+    if cache_path:
+        cache = ReviewCache(cache_path, review_rules_fingerprint(dedupe_cves=dedupe_cves), **({'max_bytes': cache_max_bytes} if cache_max_bytes else {}))
+        if overrides_csv:
+            cache.imported_overrides = load_overrides(overrides_csv)
+    if dedupe_cves and workers > 1:
+        # Verdicts are shared across groups, so scoring order matters
+        print("--dedupe-cves scores groups in order; ignoring --workers.")
+        workers = 1
+    elif cache and workers > 1:
+        print("--review-cache is updated in order; ignoring --workers.")
+        workers = 1
+    elif workers > 1:
+        print(f"Parallel scoring with {workers} workers.")
+    
+    reviewed = {}  # (vendor, component) of every packet group -> its row if nothing in it is critical
+    def track(items):
+        for item in items:
+            row = report_delta.not_critical_row(item)
+            reviewed[report_delta.row_key(row)] = row
+            yield item
+
+    with report.stage("score"):
+        for item_id, row, seconds, size, history_count in score_all(track(iter_packet(input_file, input_format)),
+                                                                     workers, cve_verdicts, cve_stats, cache):
+            report.observe_item(item_id, seconds, size)
+            report.count("review_candidates")
+            report.count("history_entries", history_count)
+            if row is not None:
+                final_rows.append(row)
+            else:
+                report.count("skipped_candidates", reason="no_critical_impact")
+
+    if cve_verdicts is not None:
+        report.count("cve_verdicts", len(cve_verdicts))
+        report.count("scored_texts", cve_stats["reused"], source="cve_verdicts")
+        report.count("scored_texts", cve_stats["scanned"], source="scan")
+        print(f"CVE verdicts: {len(cve_verdicts)} unique CVEs scored once; {cve_stats['reused']} of "
+              f"{cve_stats['reused'] + cve_stats['scanned']} texts answered from earlier verdicts.")
+
+    if cache is not None:
+        evicted = cache.save()
+        report.count("review_cache_lookups", cache.hits, result="hit")
+        report.count("review_cache_lookups", cache.misses, result="miss")
+        report.count("review_cache_evictions", evicted)
+        print(f"Review cache: {cache.hits} verdicts reused, {cache.misses} scored; "
+              f"{len(cache.entries)} stored in {cache.path}" + (f" ({evicted} evicted)." if evicted else "."))
+
+    if baseline_path:
+        packet_delta = report_delta.load_delta(report_delta.delta_path(input_file), baseline_path)
+        final_rows, statuses, not_critical = report_delta.merge_rows(final_rows, reviewed,
+                                                                     report_delta.load_baseline(baseline_path),
+                                                                     packet_delta)
+        report_delta.write_delta(statuses, report_delta.delta_path(OUTPUT_FILE), baseline_path)
+        counts = report_delta.summary(statuses)
+        for status, n in counts.items():
+            report.count("delta_groups", n, status=status)
+        print(f"Baseline {baseline_path}: {counts['new']} new, {counts['superseded']} superseded, "
+              f"{counts['unchanged']} unchanged (carried forward), {counts['dropped']} dropped. "
+              f"Saved {report_delta.delta_path(OUTPUT_FILE)}")
+
+    else:
+        not_critical = report_delta.not_critical_rows(final_rows, reviewed)
+
+    with report.stage("csv"):
+        write_report(final_rows, OUTPUT_FILE)
+        # Read back by report_delta.load_baseline() when this report is a later run's --baseline
+        report_delta.write_not_critical(not_critical, OUTPUT_FILE)
+    report.count("report_rows", len(final_rows))
     print(f"Generated {OUTPUT_FILE} with {len(final_rows)} rows.")
+    return report
+
+def write_report(rows, path):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score the LLM review packet and write the final CSV report.")
+    parser.add_argument("--word-boundary", action="store_true",
+                        help="Match CRITICAL_KEYWORDS as whole words only (e.g. 'dos' no longer matches 'windows')")
+    parser.add_argument("--format", choices=["json", "jsonl"], default=None,
+                        help="Packet format (default: jsonl if the input ends in .jsonl, else json)")
+    parser.add_argument("--input", default=None,
+                        help=f"Review packet to read (default: {INPUT_FILE}, or the .jsonl variant with --format jsonl; "
+                             "the shard manifest when only --token-budget shards exist)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used to score candidate groups (default: 1 = serial)")
+    parser.add_argument("--dedupe-cves", action="store_true",
+                        help="Score each CVE once and reuse its verdict wherever it appears again "
+                             "(other history entries, other vendors' advisories)")
+    parser.add_argument("--review-cache", nargs="?", const=REVIEW_CACHE_FILE,
+                        help=f"Reuse per-advisory verdicts across runs (default file: {REVIEW_CACHE_FILE}); "
+                             "only new or changed advisories are scored")
+    parser.add_argument("--review-cache-max-mb", type=float,
+                        help="Evict least recently used verdicts beyond this size (default: 32)")
+    parser.add_argument("--import-overrides",
+                        help="With --review-cache: reviewer-edited report CSV whose descriptions are kept as "
+                             "overrides for their advisories")
+    parser.add_argument("--baseline",
+                        help="Previous final report (CSV or JSON rows): rows of unchanged groups are carried "
+                             "forward verbatim, and each group is classified new/superseded/unchanged/dropped")
+    parser.add_argument("--report", help="Write a JSON run report (stage timings, counters, slowest candidates)")
+    parser.add_argument("--prometheus", help="Write the run report in Prometheus text format to this file")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    process_review()
+    args = parse_args()
+    WORD_BOUNDARY_MATCHING = args.word_boundary
+    input_file = args.input
+    if input_file is None:
+        input_file = os.path.splitext(INPUT_FILE)[0] + ".jsonl" if args.format == "jsonl" else INPUT_FILE
+        # patch_preprocessing.py --token-budget writes shards and a manifest instead
+        manifest = os.path.splitext(INPUT_FILE)[0] + ".shards.json"
+        if not os.path.exists(input_file) and os.path.exists(manifest):
+            input_file = manifest
+    if args.import_overrides and not args.review_cache:
+        print("Error: --import-overrides needs --review-cache.")
+        sys.exit(1)
+    report = process_review(input_file, args.format, dedupe_cves=args.dedupe_cves, workers=max(1, args.workers),
+                            cache_path=args.review_cache, overrides_csv=args.import_overrides,
+                            cache_max_bytes=int(args.review_cache_max_mb * 1024 * 1024) if args.review_cache_max_mb else None,
+                            baseline_path=args.baseline)
+    report.save(args.report, args.prometheus)
@@ -0,0 +1,161 @@
+"""Delta review against a previous final report (--baseline in both scripts).
+
+Every (vendor, component) group, the unit patch_preprocessing.py groups by, is
+classified against the rows of the baseline report:
+
+    new         the baseline has no row for the group
+    superseded  the group has a newer critical advisory than the baseline row
+    unchanged   nothing newer is critical; the baseline row is carried forward verbatim
+    dropped     a baseline row whose group has no advisories this run
+
+patch_preprocessing.py --baseline only puts new and superseded groups in the
+packet and records the classification next to it (<packet>.delta.json).
+perform_actual_review.py --baseline reviews that packet, carries the unchanged
+rows forward and writes the final classification next to the CSV.
+
+Groups with nothing critical get no CSV row, so perform_actual_review.py lists
+them in <report>.not_critical.json; load_baseline() reads that file next to the
+baseline report, so those groups count as unchanged instead of new every quarter.
+"""
+import os
+import csv
+import json
+
+STATUSES = ('new', 'superseded', 'unchanged', 'dropped')
+
+
+NOT_CRITICAL = "Not Critical"
+
+
+def row_key(row):
+    return (row["Vendor"], row["Component"])
+
+
+def not_critical_path(path):
+    """patch_review_final_report.csv -> patch_review_final_report.not_critical.json."""
+    return os.path.splitext(path)[0] + ".not_critical.json"
+
+
+def is_critical_row(row):
+    return row.get("Criticality") != NOT_CRITICAL
+
+
+def load_baseline(path):
+    """{(vendor, component): row} of a previous final report (CSV, or JSON list of rows).
+
+    Groups the report found nothing critical in come from its not_critical_path()
+    file, as rows with Criticality "Not Critical".
+    """
+    if path.endswith(".json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get('rows', [])
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    baseline = {row_key(row): row for row in rows}
+    try:
+        with open(not_critical_path(path), 'r', encoding='utf-8') as f:
+            quiet = json.load(f)
+    except FileNotFoundError:
+        quiet = []
+    for row in quiet:
+        baseline.setdefault(row_key(row), row)
+    return baseline
+
+
+def not_critical_row(item):
+    """The row recorded for a packet group (dict) in which nothing was critical."""
+    return {"Issue ID": item['id'], "Vendor": item['vendor'], "Dist Version": item['dist_version'],
+            "Component": item['component'], "Version": item['specific_version'], "Date": item['date'],
+            "Criticality": NOT_CRITICAL, "Reference": item.get('ref_url', '')}
+
+
+def write_not_critical(rows, path):
+    with open(not_critical_path(path), 'w', encoding='utf-8') as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+
+
+def delta_path(path):
+    """patches_for_llm_review.json (or its .jsonl / .shards.json) -> patches_for_llm_review.delta.json."""
+    base = os.path.splitext(path)[0]
+    if base.endswith(".shards"):
+        base = base[:-len(".shards")]
+    return base + ".delta.json"
+
+
+def write_delta(statuses, path, baseline_path):
+    """Writes {key: status} as {'baseline', 'groups': {status: [[vendor, component], ...]}}."""
+    groups = {status: [] for status in STATUSES}
+    for key, status in statuses.items():
+        groups[status].append(list(key))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'baseline': baseline_path, 'groups': groups}, f, indent=2, ensure_ascii=False)
+
+
+def load_delta(path, baseline_path):
+    """{key: status} written by write_delta for the same baseline, or None."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if os.path.abspath(data.get('baseline', '')) != os.path.abspath(baseline_path):
+        print(f"Ignoring {path}: it was built against {data.get('baseline')}.")
+        return None
+    return {tuple(key): status for status, keys in data['groups'].items() for key in keys}
+
+
+def merge_rows(rows, reviewed, baseline, packet_delta=None):
+    """Final rows, {key: status} and not-critical rows for freshly reviewed rows against the baseline.
+
+    reviewed maps the key of every group in the packet (critical or not) to the
+    row recorded for it when nothing in it is critical (see not_critical_rows).
+    packet_delta, the preprocessor's classification, tells unchanged groups left
+    out of the packet apart from dropped ones; without it they count as dropped.
+    A reviewed group that selected the baseline's advisory again, or found nothing
+    critical in its newer advisories, keeps the baseline row verbatim.
+    """
+    statuses = {}
+    merged = []
+    for row in rows:
+        key = row_key(row)
+        old = baseline.get(key)
+        if old is None:
+            statuses[key] = 'new'
+        elif old["Issue ID"] == row["Issue ID"] and is_critical_row(old):
+            statuses[key] = 'unchanged'
+            row = old
+        else:
+            statuses[key] = 'superseded'
+        merged.append(row)
+    quiet = not_critical_rows(rows, reviewed)
+    for row in quiet:
+        statuses[row_key(row)] = 'new'
+    for key, old in baseline.items():
+        if key in statuses and statuses[key] != 'new':
+            continue
+        if key in reviewed:
+            statuses[key] = 'unchanged'
+            if is_critical_row(old):
+                # The baseline's critical row still stands for the group
+                quiet = [row for row in quiet if row_key(row) != key]
+                merged.append(old)
+            continue
+        statuses[key] = (packet_delta or {}).get(key, 'dropped')
+        if statuses[key] == 'unchanged':
+            (merged if is_critical_row(old) else quiet).append(old)
+    return merged, statuses, quiet
+
+
+def not_critical_rows(rows, reviewed):
+    """The reviewed groups without a row in rows, in packet order."""
+    keys = {row_key(row) for row in rows}
+    return [row for key, row in reviewed.items() if key not in keys]
+
+def summary(statuses):
+    counts = {status: 0 for status in STATUSES}
+    for status in statuses.values():
+        counts[status] += 1
+    return counts
@@ -0,0 +1,97 @@
+"""Persistent per-advisory review verdicts, reused across perform_actual_review.py runs.
+
+Cumulative kernels bring the same advisories back run after run (as a lead, then
+as history of a newer update). A verdict is stored under the advisory ID and a
+hash of the exact text that was scored, so an advisory is only re-scored when it
+is new or its text changed. The whole cache belongs to one keyword table: a
+different rules fingerprint (CRITICAL_KEYWORDS, matching mode, --dedupe-cves)
+starts it empty.
+
+Entries hold the impacts and key sentences, the last en/ko descriptions written
+for the advisory, and any reviewer override imported from an edited report. When
+the file would exceed max_bytes, the least recently used entries are evicted.
+"""
+import os
+import json
+import hashlib
+
+DEFAULT_CACHE = "review_cache.json"
+# Size cap of the cache file; least recently used verdicts are evicted beyond it
+MAX_BYTES = 32 * 1024 * 1024
+
+
+def text_hash(texts):
+    h = hashlib.sha256()
+    for text in texts:
+        h.update(text.encode('utf-8'))
+        h.update(b"\0")
+    return h.hexdigest()[:24]
+
+
+class ReviewCache:
+    def __init__(self, path=DEFAULT_CACHE, rules="", max_bytes=MAX_BYTES):
+        """rules is the fingerprint the file must carry, or a list of acceptable ones
+        (the cache then takes on the file's, e.g. for read-only packet annotation)."""
+        accepted = [rules] if isinstance(rules, str) else list(rules)
+        self.path = path
+        self.rules = accepted[0]
+        self.max_bytes = max_bytes
+        self.entries = {}
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+        # {advisory ID: {'en', 'ko'}} from --import-overrides, attached when the advisory is scored
+        self.imported_overrides = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get('rules') not in accepted:
+            print("Review cache built with a different keyword table or matching options. Starting empty.")
+            return
+        self.rules = data['rules']
+        self.entries = data.get('entries', {})
+        # Each run advances the clock; entries remember the last run that used them
+        self.clock = data.get('clock', 0) + 1
+
+    @staticmethod
+    def key(advisory_id, texts):
+        return f"{advisory_id}|{text_hash(texts)}"
+
+    def get(self, advisory_id, texts):
+        """The verdict for advisory_id scored on exactly these texts, or None."""
+        entry = self.entries.get(self.key(advisory_id, texts))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry['used'] = self.clock
+        return entry
+
+    def peek(self, advisory_id, texts):
+        """Like get(), but without counting or refreshing the entry (for packet annotation)."""
+        return self.entries.get(self.key(advisory_id, texts))
+
+    def put(self, advisory_id, texts, impacts, sentences):
+        entry = {'impacts': impacts, 'sentences': sentences, 'used': self.clock}
+        self.entries[self.key(advisory_id, texts)] = entry
+        return entry
+
+    def save(self):
+        """Writes the cache, evicting least recently used entries beyond max_bytes. Returns how many were evicted."""
+        sizes = {key: len(json.dumps(entry, ensure_ascii=False)) + len(key) + 6
+                 for key, entry in self.entries.items()}
+        total = sum(sizes.values())
+        evicted = 0
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= sizes[key]
+            del self.entries[key]
+            evicted += 1
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rules': self.rules, 'clock': self.clock, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return evicted
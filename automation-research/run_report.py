@@ -0,0 +1,182 @@
+"""Structured run report for the PRB scripts: stage timings, counters and slowest items.
+
+Both patch_preprocessing.py and perform_actual_review.py fill a RunReport and can
+write it as JSON (--report) and/or Prometheus text exposition format (--prometheus),
+so scheduled runs can be compared without reading the console log.
+"""
+import re
+import sys
+import json
+import time
+import heapq
+import contextlib
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is reported as null
+    resource = None
+
+# How many of the slowest items to keep
+SLOWEST_ITEMS = 10
+
+
+def peak_rss_bytes(who="self"):
+    """Peak resident set size of this process (or its reaped children), or None."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def reset_peak_rss():
+    """Resets this process's peak RSS to its current RSS (Linux: VmHWM). Returns False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def stage_peak_rss_bytes():
+    """VmHWM, the peak RSS since the last reset_peak_rss(), or None."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            m = re.search(r"^VmHWM:\s+(\d+) kB", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(m.group(1)) * 1024 if m else None
+
+
+class RunReport:
+    def __init__(self, script):
+        self.script = script
+        self.started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self._slowest = []  # min-heap of (seconds, item_id, size)
+        # Resetting VmHWM also lowers ru_maxrss on Linux, so the run's peak is kept here
+        self._process_peak = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Records wall time and peak RSS of the enclosed block (stages do not nest).
+
+        On Linux the process's high-water mark is reset when the stage starts, so
+        peak_rss_bytes is the peak within the stage. Elsewhere, and for worker
+        processes, only getrusage's peak of the whole run is available: the stage
+        gets it when that peak rose during the stage, else null.
+        process_peak_rss_bytes is the peak of the whole run so far.
+        """
+        before = peak_rss_bytes("self")
+        self._process_peak = _max_known(self._process_peak, before)
+        children_before = peak_rss_bytes("children")
+        resettable = reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            after = peak_rss_bytes("self")
+            children_after = peak_rss_bytes("children")
+            if resettable:
+                stage_peak = stage_peak_rss_bytes()
+            else:
+                stage_peak = after if after is not None and after > before else None
+            self._process_peak = _max_known(self._process_peak, after, stage_peak)
+            self.stages[name] = {
+                "seconds": time.perf_counter() - start,
+                "peak_rss_bytes": stage_peak,
+                "children_peak_rss_bytes": (children_after if children_after is not None
+                                            and children_after > children_before else None),
+                "process_peak_rss_bytes": self._process_peak,
+            }
+
+    def count(self, name, n=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe_item(self, item_id, seconds, size):
+        """Keeps the SLOWEST_ITEMS slowest items (e.g. advisories) with their sizes."""
+        entry = (seconds, item_id, size)
+        if len(self._slowest) < SLOWEST_ITEMS:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def to_dict(self):
+        return {
+            "script": self.script,
+            "started": self.started,
+            "stages": self.stages,
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            "gauges": self.gauges,
+            "slowest_items": [
+                {"id": item_id, "seconds": seconds, "size_bytes": size}
+                for seconds, item_id, size in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        lines = []
+
+        def emit(metric, help_text, samples):
+            lines.append(f"# HELP prb_{metric} {help_text}")
+            lines.append(f"# TYPE prb_{metric} {'counter' if metric.endswith('_total') else 'gauge'}")
+            for labels, value in samples:
+                labels = dict({"script": self.script}, **labels)
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"prb_{metric}{{{label_str}}} {value}")
+
+        emit("stage_seconds", "Wall time per pipeline stage.",
+             [({"stage": name}, s["seconds"]) for name, s in self.stages.items()])
+        emit("stage_peak_rss_bytes", "Peak RSS of the process during each stage.",
+             [({"stage": name}, s["peak_rss_bytes"]) for name, s in self.stages.items()
+              if s["peak_rss_bytes"] is not None])
+        emit("stage_children_peak_rss_bytes", "Peak RSS of worker processes that reached a new high during each stage.",
+             [({"stage": name}, s["children_peak_rss_bytes"]) for name, s in self.stages.items()
+              if s["children_peak_rss_bytes"] is not None])
+        emit("process_peak_rss_bytes", "Process peak RSS of the whole run at the end of each stage.",
+             [({"stage": name}, s["process_peak_rss_bytes"]) for name, s in self.stages.items()
+              if s["process_peak_rss_bytes"] is not None])
+        for name in sorted({name for name, _ in self.counters}):
+            emit(f"{name}_total", f"Count of {name.replace('_', ' ')}.",
+                 [(dict(labels), value) for (n, labels), value in sorted(self.counters.items()) if n == name])
+        for name, value in self.gauges.items():
+            emit(name, name.replace('_', ' ').capitalize() + ".", [({}, value)])
+        emit("slowest_item_seconds", "Processing time of the slowest items.",
+             [({"item": item_id, "size_bytes": size}, seconds) for seconds, item_id, size in sorted(self._slowest, reverse=True)])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+    def save(self, json_path=None, prometheus_path=None):
+        if json_path:
+            self.write_json(json_path)
+            print(f"Saved run report to {json_path}")
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+            print(f"Saved Prometheus metrics to {prometheus_path}")
+
+
+def _max_known(*values):
+    known = [v for v in values if v is not None]
+    return max(known) if known else None
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# NOTE: Generates a synthetic batch_data/ directory in the same JSON shape that
+# batch_collector.js writes, so patch_preprocessing.py and perform_actual_review.py
+# can be benchmarked at sizes we never see in a single real quarter (1k - 1M advisories).
+# Output is fully determined by --seed and --count.
+
+# Vendor mix roughly matching a real collection (see DEVELOPMENT_LOG.md: ~255 RH / 64 OL / USN)
+VENDOR_WEIGHTS = {"Red Hat": 0.60, "Oracle": 0.15, "Ubuntu": 0.25}
+
+# Core packages (pass the whitelist) and noise packages (pruned), with relative weights
+CORE_PACKAGES = [
+    ("kernel", 8), ("openssl", 3), ("glibc", 3), ("systemd", 2), ("openssh", 2),
+    ("bind", 2), ("sudo", 1), ("podman", 1), ("runc", 1), ("containerd", 1),
+    ("libvirt", 1), ("qemu-kvm", 1), ("pacemaker", 1), ("fence-agents", 1),
+    ("microcode", 1), ("gnutls", 1), ("nss", 1), ("polkit", 1), ("lvm2", 1),
+]
+NOISE_PACKAGES = [
+    ("firefox", 3), ("thunderbird", 2), ("libreoffice", 1), ("python-urllib3", 1),
+    ("nodejs", 1), ("ruby", 1), ("php", 1), ("vim", 1), ("gimp", 1), ("libxml2", 2),
+    ("curl", 2), ("git", 1), ("tomcat", 1), ("postgresql", 1), ("texlive", 1),
+]
+
+RHEL_MAJORS = ["8", "9", "10"]
+RH_VARIANTS = ["", " Extended Update Support", " Advanced Mission Critical Update Support",
+               " Update Services for SAP Solutions", " Extended Lifecycle Support"]
+OL_UEK_STREAMS = [("5.4", "5.4.17-2136.{b}.{c}", ["7", "8"]),
+                  ("5.15", "5.15.0-{b}.{c}.4.1", ["8", "9"]),
+                  ("6.12", "6.12.0-{b}.{c}.2", ["9", "10"])]
+UBUNTU_RELEASES = [("24.04 LTS", "noble"), ("22.04 LTS", "jammy"), ("20.04 LTS", "focal"), ("25.10", "questing")]
+
+SUBSYSTEMS = ["mptcp", "tipc", "sctp", "vsock", "xfrm", "net/sched", "ext4", "xfs", "nfs", "fuse",
+              "Bluetooth", "RDMA/core", "scsi", "drm/amdgpu", "fbdev", "ice", "bpf", "io_uring", "smb"]
+FAILURES = ["use-after-free in {f}()", "NULL pointer dereference in {f}()", "race condition in {f}()",
+            "out-of-bounds write in {f}()", "deadlock on {f}() reclaim", "memory leak in {f}()",
+            "integer overflow in {f}()", "refcount leak in {f}()", "incorrect length check in {f}()",
+            "typo in {f}() comment", "missing error handling in {f}()"]
+FUNCS = ["schedule_work", "pm_del_add_timer", "mon_reinit_self", "readdir", "connect", "destroy",
+         "register_device", "fill_dirent", "queue_rq", "tx_ring_clean", "setsockopt", "probe", "release"]
+AUTHORS = ["Paolo Abeni", "Eric Dumazet", "Jakub Kicinski", "Greg Kroah-Hartman", "Sasha Levin",
+           "Jens Axboe", "Al Viro", "Jan Kara", "Christoph Hellwig", "Takashi Iwai"]
+
+RH_BOILERPLATE = ("Skip to navigation Skip to main content Utilities Subscriptions Downloads Red Hat Console "
+                  "Get Support We use cookies on our websites to deliver our online services. Details about how "
+                  "we use cookies and how you may disable them are set out in our Privacy Statement. ")
+
+
+def weighted(rng, pairs):
+    names, weights = zip(*pairs)
+    return rng.choices(names, weights=weights)[0]
+
+
+def cve(rng, year):
+    return f"CVE-{year}-{rng.randint(1000, 69999)}"
+
+
+def fix_line(rng, year):
+    sub = rng.choice(SUBSYSTEMS)
+    failure = rng.choice(FAILURES).format(f=f"{sub.split('/')[-1].lower()}_{rng.choice(FUNCS)}")
+    return sub, failure, cve(rng, year)
+
+
+def redhat_advisory(rng, seq, date):
+    pkg = weighted(rng, CORE_PACKAGES + NOISE_PACKAGES)
+    major = rng.choice(RHEL_MAJORS)
+    variant = rng.choices(RH_VARIANTS, weights=[70, 12, 6, 6, 6])[0]
+    if rng.random() < 0.03:
+        product = "OpenShift Container Platform 4.16"
+    else:
+        product = f"Red Hat Enterprise Linux {major}{variant}"
+    severity = rng.choice(["Important", "Moderate", "Critical", "Low"])
+    adv_id = f"RHSA-{date.year}:{seq}"
+    fixes = [fix_line(rng, date.year) for _ in range(rng.randint(1, 12 if pkg == "kernel" else 4))]
+    fix_text = " ".join(f"* {pkg}: {sub}: {failure} ({c})" for sub, failure, c in fixes)
+    synopsis = f"{severity}: {pkg} security update"
+    full_text = (
+        f"{RH_BOILERPLATE}{adv_id} - Security Advisory Issued: {date:%Y-%m-%d} Updated: {date:%Y-%m-%d} "
+        f"{adv_id} - Security Advisory Synopsis {synopsis} Type/Severity Security Advisory: {severity} "
+        f"Topic An update for {pkg} is now available for {product}. Red Hat Product Security has rated this "
+        f"update as having a security impact of {severity}. "
+        f"Description The {pkg} packages provide core functionality for {product}. "
+        f"Security Fix(es): {fix_text} For more details about the security issue(s), including the impact, "
+        f"a CVSS score, acknowledgments, and other related information, refer to the CVE page(s) listed in "
+        f"the References section. Solution For details on how to apply this update, which includes the changes "
+        f"described in this advisory, refer to: https://access.redhat.com/articles/11258 Affected Products "
+        f"{product} x86_64 Fixes References https://access.redhat.com/security/updates/classification/#{severity.lower()}"
+    )
+    return {
+        "id": adv_id,
+        "vendor": "Red Hat",
+        "title": f"{adv_id} - {synopsis}",
+        "synopsis": synopsis,
+        "dateStr": date.isoformat() + "Z",
+        "url": f"https://access.redhat.com/errata/{adv_id}",
+        "full_text": full_text,
+    }
+
+
+def uek_changelog(rng, version, year, entries):
+    lines = []
+    for block in range(max(1, entries // 25)):
+        lines.append(f"[{version}]" if block == 0 else f"[{version.rsplit('.', 1)[0]}.{block}]")
+        for _ in range(min(25, entries)):
+            sub, failure, c = fix_line(rng, year)
+            tag = f" {{{c}}}" if rng.random() < 0.6 else ""
+            lines.append(f"- {sub}: fix {failure} ({rng.choice(AUTHORS)}) [Orabug: {rng.randint(30000000, 38999999)}]{tag}")
+    return "\n".join(lines)
+
+
+def oracle_advisory(rng, seq, date):
+    series, ver_tpl, ol_majors = rng.choice(OL_UEK_STREAMS)
+    ol = rng.choice(ol_majors)
+    version = ver_tpl.format(b=rng.randint(100, 330), c=rng.randint(1, 200))
+    adv_id = f"ELSA-{date.year}-{50000 + seq}"
+    # Cumulative UEK errata carry long changelogs (hundreds of entries)
+    changelog = uek_changelog(rng, version, date.year, rng.choice([20, 60, 150, 400]))
+    synopsis = "Important: Unbreakable Enterprise kernel security update"
+    full_text = (
+        f"Oracle Linux Security Advisory {adv_id} http://linux.oracle.com/errata/{adv_id}.html "
+        f"The following updated rpms for Oracle Linux {ol} have been uploaded to the Unbreakable Linux Network: "
+        f"x86_64: kernel-uek-{version}.el{ol}uek.x86_64.rpm kernel-uek-devel-{version}.el{ol}uek.x86_64.rpm "
+        f"SRPMS: http://oss.oracle.com/ol{ol}/SRPMS-updates/kernel-uek-{version}.el{ol}uek.src.rpm "
+        f"Related CVEs: {' '.join(cve(rng, date.year) for _ in range(rng.randint(1, 30)))} "
+        f"Description of changes:\n{changelog}"
+    )
+    return {
+        "id": adv_id,
+        "vendor": "Oracle",
+        "title": f"[El-errata] {adv_id} {synopsis} (Oracle Linux {ol})",
+        "synopsis": f"{synopsis} {version}",
+        "dateStr": f"{date.year}-{date:%B}",
+        "url": f"https://oss.oracle.com/pipermail/el-errata/{date.year}-{date:%B}/{seq:06d}.html",
+        "full_text": full_text,
+    }
+
+
+def ubuntu_advisory(rng, seq, date):
+    pkg = weighted(rng, CORE_PACKAGES + NOISE_PACKAGES)
+    releases = rng.sample(UBUNTU_RELEASES, rng.randint(1, 3))
+    adv_id = f"USN-{7000 + seq // 3}-{seq % 3 + 1}"
+    src = "linux" if pkg == "kernel" else pkg
+    variant = rng.choice(["", "", "", "-aws", "-gcp", "-nvidia", "-fips"]) if pkg == "kernel" else ""
+    fixes = [fix_line(rng, date.year) for _ in range(rng.randint(1, 40 if pkg == "kernel" else 3))]
+    details = " ".join(f"It was discovered that the {sub} subsystem had a {failure}. An attacker could possibly "
+                       f"use this to cause a denial of service. ({c})" for sub, failure, c in fixes)
+    if pkg == "kernel":
+        packages = f"linux{variant} - Linux kernel{' for ' + variant[1:].upper() + ' systems' if variant else ''}"
+    else:
+        packages = f"{src} - {src} library and utilities"
+    table = []
+    for rel, codename in releases:
+        base = f"{rng.randint(1, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 200)}"
+        bin_name = f"linux-image-generic{variant}" if pkg == "kernel" else src
+        table.append(f"{rel} {codename} {bin_name} – {base}-0ubuntu{rng.randint(1, 9)}~{rel.split()[0]}.{rng.randint(1, 5)}")
+    full_text = (
+        f"{adv_id}: {pkg} vulnerabilities Publication date {date:%d %B %Y} Overview Several security issues were "
+        f"fixed in {src}. Releases {' '.join('Ubuntu ' + r for r, _ in releases)} Packages {packages} "
+        f"Details {details} Update instructions The problem can be corrected by updating your system to the "
+        f"following package versions: {' '.join(table)} In general, a standard system update will make all the "
+        f"necessary changes. References {' '.join(c for _, _, c in fixes)}"
+    )
+    return {
+        "id": adv_id,
+        "vendor": "Ubuntu",
+        "title": f"{adv_id}: {'Linux kernel' if pkg == 'kernel' else pkg} vulnerabilities",
+        "synopsis": f"Several security issues were fixed in {src}.",
+        "pubDate": date.isoformat() + ".000Z",
+        "url": f"https://ubuntu.com/security/notices/{adv_id}",
+        "full_text": full_text,
+    }
+
+
+GENERATORS = {"Red Hat": redhat_advisory, "Oracle": oracle_advisory, "Ubuntu": ubuntu_advisory}
+
+
+def generate_corpus(out_dir, count, seed=0, start=datetime(2025, 12, 1), days=120):
+    """Writes `count` advisory JSON files into out_dir and returns their paths."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    vendors = list(VENDOR_WEIGHTS)
+    weights = list(VENDOR_WEIGHTS.values())
+    paths = []
+    for seq in range(count):
+        vendor = rng.choices(vendors, weights=weights)[0]
+        date = start + timedelta(days=rng.randrange(days), seconds=rng.randrange(86400))
+        adv = GENERATORS[vendor](rng, seq, date)
+        # Same filename rule as batch_collector.js saveAdvisory(); ids are unique per seq
+        path = os.path.join(out_dir, re.sub(r"[^a-zA-Z0-9\-_]", "_", adv['id']) + ".json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(adv, f, indent=2, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic batch_data/ corpus for benchmarking.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of advisories (default: 1000)")
+    parser.add_argument("--out", default="bench_data", help="Output directory (default: bench_data)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    paths = generate_corpus(args.out, args.count, args.seed)
+    print(f"Wrote {len(paths)} advisories to {args.out}")
@@ -0,0 +1,18 @@
+import os
+import sys
+import json
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The scripts import each other as top-level modules
+sys.path.insert(0, ROOT)
+
+SAMPLE_PACKET = os.path.join(ROOT, os.pardir, "os", "patches_for_llm_review.json")
+
+
+@pytest.fixture(scope="session")
+def sample_packet():
+    """The review packet checked in under os/ (22 candidates with history)."""
+    with open(SAMPLE_PACKET, 'r', encoding='utf-8') as f:
+        return json.load(f)
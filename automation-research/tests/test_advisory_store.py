@@ -0,0 +1,100 @@
+"""SQLite advisory store round trip and lazily loaded full_text."""
+import json
+import sqlite3
+
+import advisory_store
+from patch_record import Patch
+
+STAT = {'size': 1, 'mtime_ns': 1, 'sha256': "x"}
+ADVISORY = {
+    'id': "ELSA-2026-1", 'vendor': "Oracle", 'dateStr': "2026-02",
+    'title': "ELSA-2026-1 Important: Oracle Linux 9 openssl security update",
+    'synopsis': "ELSA-2026-1 Important: Oracle Linux 9 openssl security update",
+    'full_text': "Oracle Linux 9 openssl-3.0.7-27.el9 fixes CVE-2026-0001, a remote code execution.",
+    'url': "https://oss.oracle.com/pipermail/el-errata/2026-February/1.html",
+}
+
+
+def record(pid, dist):
+    p = Patch(pid, "RHSA-2026:1", "Red Hat", dist, "2026-02-11", "openssl", "3.0.7-27.el9",
+              "summary", "diff", "cleaned text RHSA-2026:1")
+    p.cves = ["CVE-2026-0001", "CVE-2026-0002"]
+    return p
+
+
+def test_query_keeps_cves_and_reads_text_from_store(tmp_path, monkeypatch):
+    db = str(tmp_path / "advisories.db")
+    conn = advisory_store.open_store(db, "rules")
+    with conn:
+        advisory_store.put_file(conn, "batch_data/RHSA-2026_1.json", STAT,
+                                [record("RHSA-2026:1-8", "8"), record("RHSA-2026:1-9", "9")])
+    patches = list(advisory_store.query_patches(conn, since="2026-02-01", lazy_text=True))
+    conn.close()
+    assert [p.id for p in patches] == ["RHSA-2026:1-8", "RHSA-2026:1-9"]
+    assert patches[0].cves == ["CVE-2026-0001", "CVE-2026-0002"]
+    assert not patches[0].full_text_loaded
+
+    def unreachable(path):
+        raise AssertionError(path)
+    loads = []
+    store_loader = advisory_store.TextLoader(db, unreachable)
+    monkeypatch.setattr(Patch, "text_loader", lambda path: loads.append(path) or store_loader(path))
+    assert patches[0].full_text == "cleaned text RHSA-2026:1"
+    assert patches[0].full_text == "cleaned text RHSA-2026:1"
+    # Loaded once, then kept on the record
+    assert loads == ["batch_data/RHSA-2026_1.json"]
+    store_loader.close()
+    assert store_loader.conn is None
+
+
+def test_older_layout_is_rebuilt(tmp_path):
+    db = str(tmp_path / "advisories.db")
+    old = sqlite3.connect(db)
+    old.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT, excluded_by TEXT);
+        CREATE TABLE advisories (rowid INTEGER PRIMARY KEY, source_path TEXT, seq INTEGER, id TEXT);
+        INSERT INTO meta VALUES ('rules', 'rules');
+        INSERT INTO files VALUES ('a.json', 1, 1, 'x', NULL);
+    """)
+    old.commit()
+    old.close()
+    conn = advisory_store.open_store(db, "rules")
+    assert advisory_store.file_entries(conn) == {}
+    with conn:
+        advisory_store.put_file(conn, "a.json", STAT, [record("RHSA-2026:1", "9")])
+    assert [p.cves for p in advisory_store.query_patches(conn)] == [["CVE-2026-0001", "CVE-2026-0002"]]
+
+
+
+def test_file_that_stops_parsing_leaves_the_store(tmp_path):
+    import patch_preprocessing as pre
+    from run_report import RunReport
+
+    path = tmp_path / "ELSA-2026-1.json"
+    path.write_text(json.dumps(ADVISORY), encoding='utf-8')
+    conn = advisory_store.open_store(str(tmp_path / "advisories.db"), "rules")
+    pre.sync_store(conn, [str(path)], 1, RunReport("test"))
+    assert list(advisory_store.file_entries(conn)) == [str(path)]
+
+    path.write_text("{not json", encoding='utf-8')
+    report = RunReport("test")
+    pre.sync_store(conn, [str(path)], 1, report)
+    # Dropped like the directory backend drops it, and retried on the next run
+    assert advisory_store.file_entries(conn) == {}
+    assert list(advisory_store.query_patches(conn)) == []
+    assert report.counters[("ingest_errors", ())] == 1
+
+
+def test_store_loader_is_released_after_each_run(tmp_path, monkeypatch):
+    import patch_preprocessing as pre
+
+    (tmp_path / "batch_data").mkdir()
+    (tmp_path / "batch_data" / "ELSA-2026-1.json").write_text(json.dumps(ADVISORY), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    closed = []
+    monkeypatch.setattr(advisory_store.TextLoader, "close", lambda self: closed.append(self))
+    for _ in range(2):
+        pre.preprocess_patches(cache_path=None, db_path="advisories.db")
+        assert Patch.text_loader is pre.load_full_text
+    assert len(closed) == 2
@@ -0,0 +1,66 @@
+"""match_core_component() / get_component_name() against the per-core regex loops they replaced."""
+import re
+
+import pytest
+
+import patch_preprocessing as pre
+
+
+def old_match_core_component(text):
+    for core in pre.SYSTEM_CORE_COMPONENTS:
+        if re.search(fr'\b{re.escape(core)}\b', text):
+            return core
+    return None
+
+
+def old_get_component_name(vendor, title, summary, full_text):
+    """get_component_name() before the single-pass matcher (Oracle branch unchanged, so delegated)."""
+    if vendor == "Oracle":
+        return pre.get_component_name(vendor, title, summary, full_text)
+    text = (title + " " + summary + " " + full_text).lower()
+    text_primary = (title + " " + summary).lower()
+    core = old_match_core_component(text_primary) or old_match_core_component(text)
+    if core:
+        return core
+    m = re.search(r'([a-z0-9]+(-[a-z0-9]+)*)-\d+\.\d+', text_primary)
+    if not m:
+        m = re.search(r'([a-z0-9]+(-[a-z0-9]+)*)-\d+\.\d+', text)
+    if m:
+        name = m.group(1)
+        for core in pre.SYSTEM_CORE_COMPONENTS:
+            if core == name or name.startswith(core + "-"):
+                return core
+        return name
+    return "other"
+
+
+def sample_texts(packet):
+    for cand in packet:
+        yield cand['summary']
+        yield cand['full_text']
+        yield cand['diff_content']
+        for hist in cand.get('history', []):
+            yield hist['diff_summary']
+
+
+def test_sample_components_unchanged(sample_packet):
+    for cand in sample_packet:
+        args = (cand['vendor'], "", cand['summary'], cand['full_text'])
+        assert pre.get_component_name(*args) == old_get_component_name(*args), cand['id']
+
+
+def test_sample_texts_match_like_the_loop(sample_packet):
+    for text in sample_texts(sample_packet):
+        assert pre.match_core_component(text.lower()) == old_match_core_component(text.lower())
+
+
+@pytest.mark.parametrize("text", [
+    "qemu-kvm security update",          # overlapping hits: qemu-kvm, qemu and kvm all match
+    "kvm and qemu-kvm",                  # a lower-priority core earlier in the text
+    "libvirt, glibc and kernel fixes",   # kernel is first in SYSTEM_CORE_COMPONENTS
+    "bind-utils update",                 # bind (listed first) matches as a whole word too
+    "kernelspace tools",                 # no whole-word hit
+    "",
+])
+def test_priority_follows_list_order(text):
+    assert pre.match_core_component(text) == old_match_core_component(text)
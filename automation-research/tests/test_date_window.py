@@ -0,0 +1,81 @@
+"""--quarter / --days windows, collector date normalization and the metadata sidecar."""
+import json
+from datetime import date
+
+import pytest
+
+import patch_preprocessing as pre
+from run_report import RunReport
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2026-02-11", "2026-02-11"),
+    ("2026-02-11T09:30:00.000Z", "2026-02-11"),
+    ("2025-12", "2025-12"),
+    ("2026-February", "2026-02"),
+    ("Feb 11, 2026", "2026-02-11"),
+    ("11 February 2026", "2026-02-11"),
+    ("3 Mar 2026", "2026-03-03"),
+    ("Thu, 12 Feb 2026 10:00:00 +0000", "2026-02-12"),
+    ("", "Unknown"),
+])
+def test_parse_date(raw, expected):
+    assert pre.parse_date(raw) == expected
+
+
+def test_quarter_window_has_one_month_buffer():
+    assert pre.date_window("2026-Q1") == (date(2025, 12, 1), date(2026, 4, 1))
+    assert pre.date_window("2025-Q4") == (date(2025, 9, 1), date(2026, 1, 1))
+
+
+def test_days_window_snaps_to_first_of_month():
+    today = date(2026, 5, 20)
+    assert pre.date_window(days=30, today=today) == (date(2026, 4, 1), date(2026, 5, 21))
+    # Default lookback, like parseDateRange() without arguments
+    assert pre.date_window(today=today) == (date(2026, 2, 1), date(2026, 5, 21))
+
+
+def test_invalid_quarter():
+    with pytest.raises(ValueError):
+        pre.date_window("2026-Q5")
+
+
+def test_all_excludes_window_flags():
+    assert pre.parse_args(["--all"]).all
+    with pytest.raises(SystemExit):
+        pre.parse_args(["--all", "--days", "30"])
+
+
+def write_advisory(directory, name, **fields):
+    path = directory / name
+    path.write_text(json.dumps(dict({"id": name[:-5], "vendor": "Red Hat", "full_text": "x"}, **fields), indent=2))
+    return str(path)
+
+
+def test_filter_by_window_keeps_undated(tmp_path, capsys):
+    inside = write_advisory(tmp_path, "RHSA-1.json", dateStr="Feb 11, 2026")
+    outside = write_advisory(tmp_path, "RHSA-2.json", dateStr="2025-06-01")
+    undated = write_advisory(tmp_path, "RHSA-3.json", dateStr="soon")
+    report = RunReport("test")
+    kept = pre.filter_by_window([inside, outside, undated], pre.date_window("2026-Q1"), report)
+    assert kept == [inside, undated]
+    assert "RHSA-3.json" in capsys.readouterr().out
+    assert report.counters[("advisory_files_undated", ())] == 1
+    index = json.loads((tmp_path / pre.METADATA_INDEX_FILE).read_text())
+    assert index["RHSA-1.json"]["date"] == "2026-02-11"
+
+
+def test_partial_list_keeps_other_sidecar_entries(tmp_path):
+    first = write_advisory(tmp_path, "RHSA-1.json", dateStr="2026-02-11")
+    second = write_advisory(tmp_path, "RHSA-2.json", dateStr="2026-02-12")
+    window = pre.date_window("2026-Q1")
+    report = RunReport("test")
+    pre.filter_by_window([first, second], window, report)
+    # One --watch poll only sees the files that just became ready
+    pre.filter_by_window([second], window, report, prune=False)
+    index = json.loads((tmp_path / pre.METADATA_INDEX_FILE).read_text())
+    assert set(index) == {"RHSA-1.json", "RHSA-2.json"}
+
+    (tmp_path / "RHSA-1.json").unlink()
+    pre.filter_by_window([second], window, report)
+    assert set(json.loads((tmp_path / pre.METADATA_INDEX_FILE).read_text())) == {"RHSA-2.json"}
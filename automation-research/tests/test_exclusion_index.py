@@ -0,0 +1,70 @@
+"""Exclusion index keys, lookups and imports."""
+import csv
+
+import exclusion_index as ex
+from patch_record import Patch
+from perform_actual_review import REPORT_FIELDS
+
+
+def patch(pid="RHSA-2026:10", component="openssl", version="3.0.7-27.el9", cves=("CVE-2026-1001",)):
+    p = Patch(pid, pid, "Red Hat", "9", "2026-02-11", component, version, "", "", "")
+    p.cves = list(cves)
+    return p
+
+
+def test_match_by_each_kind(tmp_path):
+    index = ex.ExclusionIndex(str(tmp_path / "index.json"))
+    index.add("RHSA-2026:1", "not deployed", "Red Hat", "openssl", "3.0.7-27.el9", ["CVE-2026-1001"])
+    assert index.match(patch("RHSA-2026:1"))['match'] == 'id'
+    assert index.match(patch())['match'] == 'package'
+    assert index.match(patch(version="3.0.7-28.el9")) == {'match': 'cves', 'id': "RHSA-2026:1",
+                                                          'reason': "not deployed"}
+    assert index.match(patch(version="3.0.7-28.el9", cves=["CVE-2026-1001", "CVE-2026-1002"])) is None
+
+
+def test_no_version_never_excludes_the_whole_component(tmp_path):
+    index = ex.ExclusionIndex(str(tmp_path / "index.json"))
+    index.add("RHSA-2026:1", "", "Red Hat", "openssl", "", None)
+    assert index.maps['package'] == {}
+    assert index.match(patch(cves=())) is None
+
+
+def test_save_load_remove(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = ex.ExclusionIndex(path)
+    index.add("RHSA-2026:1", "", "Red Hat", "openssl", "3.0.7-27.el9", ["CVE-2026-1001"])
+    index.save()
+    loaded = ex.ExclusionIndex(path)
+    assert len(loaded) == 1
+    assert loaded.remove("RHSA-2026:1") == 3
+    assert loaded.match(patch()) is None
+
+
+def test_csv_needs_a_decision(tmp_path):
+    path = tmp_path / "report.csv"
+    rows = [{"Issue ID": "RHSA-2026:1", "Vendor": "Red Hat", "Component": "openssl", "Criticality": "Critical"},
+            {"Issue ID": "RHSA-2026:2", "Vendor": "Red Hat", "Component": "glibc", "Criticality": "Critical"}]
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS + ["Decision"], restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    index = ex.ExclusionIndex(str(tmp_path / "index.json"))
+    # An unedited report: every row is Critical and nothing is rejected
+    assert ex.import_rows(index, ex.csv_rows(str(path))) == 0
+
+    rows[1]["Decision"] = "Reject"
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS + ["Decision"], restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    assert ex.import_rows(index, ex.csv_rows(str(path))) == 1
+    assert list(index.maps['id']) == ["RHSA-2026:2"]
+
+
+def test_import_ids(tmp_path):
+    path = tmp_path / "rejected.txt"
+    path.write_text("# board decisions\nRHSA-2026:1 not deployed\n\nUSN-7047-1\n", encoding='utf-8')
+    index = ex.ExclusionIndex(str(tmp_path / "index.json"))
+    assert ex.import_rows(index, ex.id_rows(str(path))) == 2
+    assert index.maps['id'] == {"RHSA-2026:1": ["RHSA-2026:1", "not deployed"],
+                                "USN-7047-1": ["USN-7047-1", "rejected"]}
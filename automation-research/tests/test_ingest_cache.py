@@ -0,0 +1,41 @@
+"""The ingest cache, and --no-cache skipping it entirely."""
+import json
+
+import patch_preprocessing as pre
+from run_report import RunReport
+
+ADVISORY = {
+    'id': "ELSA-2026-1", 'vendor': "Oracle", 'dateStr': "2026-02",
+    'title': "ELSA-2026-1 Important: Oracle Linux 9 openssl security update",
+    'synopsis': "ELSA-2026-1 Important: Oracle Linux 9 openssl security update",
+    'full_text': "Oracle Linux 9 openssl-3.0.7-27.el9 fixes CVE-2026-0001, a remote code execution.",
+    'url': "https://oss.oracle.com/pipermail/el-errata/2026-February/1.html",
+}
+
+
+def advisory_file(tmp_path):
+    path = tmp_path / "ELSA-2026-1.json"
+    path.write_text(json.dumps(ADVISORY), encoding='utf-8')
+    return str(path)
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path):
+    path = advisory_file(tmp_path)
+    cache = str(tmp_path / "ingest_cache.json")
+    first, parsed = pre.load_from_directory([path], 1, cache, RunReport("test"))
+    assert parsed == 1
+    second, parsed = pre.load_from_directory([path], 1, cache, RunReport("test"))
+    assert parsed == 0
+    assert [p.to_dict(lazy=True) for p in second] == [p.to_dict(lazy=True) for p in first]
+
+
+def test_no_cache_neither_hashes_nor_records(tmp_path, monkeypatch):
+    path = advisory_file(tmp_path)
+    def unreachable(*args):
+        raise AssertionError(args)
+    monkeypatch.setattr(pre, "file_sha256", unreachable)
+    monkeypatch.setattr(pre.Patch, "to_dict", unreachable)
+    raw_list, parsed = pre.load_from_directory([path], 1, None, RunReport("test"))
+    assert parsed == 1
+    assert [p.id for p in raw_list] == ["ELSA-2026-1"]
+    assert list(tmp_path.iterdir()) == [tmp_path / "ELSA-2026-1.json"]
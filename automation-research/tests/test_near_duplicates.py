@@ -0,0 +1,91 @@
+"""MinHash/LSH near-duplicate clustering and folding within a group."""
+import near_duplicates as nd
+import patch_preprocessing as pre
+from patch_record import Patch
+from perform_actual_review import review_item
+
+FIX = ("A use-after-free in the tipc subsystem could allow a local attacker to crash the system or "
+       "escalate privileges. A race in the ext4 journal could cause data corruption after a power loss. "
+       "Update instructions: install kernel {version} and reboot.")
+OTHER = ("This update improves the wording of the runc manual pages and the help output of several "
+         "subcommands, and refreshes the bundled documentation examples.")
+
+
+def test_versions_are_masked():
+    a = nd.shingles(FIX.format(version="5.14.0-427.13.1.el9_4"))
+    b = nd.shingles(FIX.format(version="5.14.0-503.11.1.el9_5"))
+    assert a == b
+    assert nd.similarity(nd.signature(a), nd.signature(b)) == 1.0
+    assert nd.similarity(nd.signature(a), nd.signature(nd.shingles(OTHER))) < 0.2
+    assert nd.shingles("") == set()
+
+
+def test_cluster_keeps_scope_and_earliest_representative():
+    items = [
+        ("c", "Red Hat", OTHER),
+        ("a", "Red Hat", FIX.format(version="1.0-1")),
+        ("b", "Red Hat", FIX.format(version="1.0-2") + " Also applies to EUS."),
+        ("x", "Oracle", FIX.format(version="1.0-3")),
+        ("empty", "Red Hat", ""),
+    ]
+    clusters = nd.cluster(items, threshold=0.7)
+    assert len(clusters) == 1
+    (rep, rep_sim), (member, sim) = clusters[0]
+    assert (rep, rep_sim, member) == ("a", 1.0, "b")
+    assert 0.7 <= sim < 1.0
+    assert nd.cluster(items, threshold=1.0) == []
+
+
+def patch(pid, dist, date, text, known_exclusion=None):
+    p = Patch(pid, pid.split("-24")[0].split("-22")[0], "Ubuntu", dist, date, "runc", "", "", text, "")
+    p.cves = []
+    p.known_exclusion = known_exclusion
+    return p
+
+
+def group():
+    return [
+        patch("USN-2-24.04_LTS", "24.04 LTS", "2026-02-10", FIX.format(version="1.3.3-0ubuntu1~24.04.3")),
+        patch("USN-2-22.04_LTS", "22.04 LTS", "2026-02-10", FIX.format(version="1.3.3-0ubuntu1~22.04.3")),
+        patch("USN-1", "24.04 LTS", "2026-01-05", OTHER),
+        patch("USN-0-22.04_LTS", "22.04 LTS", "2025-12-01", FIX.format(version="1.2.0-0ubuntu1"),
+              known_exclusion={'match': 'id', 'id': "USN-0", 'reason': ""}),
+    ]
+
+
+def test_folds_split_rows_into_the_newest():
+    g = group()
+    folds = pre.near_duplicate_folds(g)
+    assert folds == {0: [(1, 1.0)]}
+    assert [(m['id'], m['dist_version'], m['similarity']) for m in pre.near_duplicate_list(g, folds[0])] == \
+        [("USN-2-22.04_LTS", "22.04 LTS", 1.0)]
+    # The folded row gets no history entry; the known exclusion keeps its own
+    assert [h.id for h in pre.history_entries(g, folds=folds)] == ["USN-1", "USN-0-22.04_LTS"]
+
+
+def test_duplicate_ids_are_folded_by_position():
+    # The 22.04 split row also arrived as a file of its own, with unrelated text
+    g = group()
+    g.insert(2, patch("USN-2-22.04_LTS", "22.04 LTS", "2026-02-10",
+                      "Fixes a crash in checkpoint restore of containers with many bind mounts, which now fails "
+                      "with a clear error message instead of leaving the container half restored."))
+    folds = pre.near_duplicate_folds(g)
+    assert folds == {0: [(1, 1.0)]}
+    assert [h.id for h in pre.history_entries(g, folds=folds)] == ["USN-2-22.04_LTS", "USN-1", "USN-0-22.04_LTS"]
+
+
+def test_packet_lists_members_and_reviewer_applies_the_verdict():
+    cand = next(pre.iter_review_candidates({("Ubuntu", "runc"): group()}, near_duplicate_threshold=nd.THRESHOLD))
+    assert [m['id'] for m in cand.near_duplicates] == ["USN-2-22.04_LTS"]
+    assert "near_duplicates" in cand.review_instructions
+
+    row = review_item(Patch.from_dict(cand.to_dict()))
+    assert row["Issue ID"] == "USN-2-24.04_LTS"
+    # The lead, its folded split row and the critical USN-0 entry
+    assert row["한글 설명"].endswith("(누적 패치 포함: 3건)")
+
+
+def test_off_by_default():
+    cand = next(pre.iter_review_candidates({("Ubuntu", "runc"): group()}))
+    assert cand.near_duplicates is None
+    assert len(cand.history) == 3
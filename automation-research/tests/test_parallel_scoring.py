@@ -0,0 +1,26 @@
+"""perform_actual_review.score_all with --workers: same results, streamed in bounded batches."""
+import perform_actual_review as review
+
+
+def test_workers_stream_in_batches(sample_packet, monkeypatch):
+    monkeypatch.setattr(review, "REVIEW_CHUNKSIZE", 1)
+    monkeypatch.setattr(review, "REVIEW_BATCH_CHUNKS", 2)
+    pulled = []
+    def stream():
+        for item in sample_packet:
+            pulled.append(item['id'])
+            yield item
+
+    serial = [row for _, row, _, _, _ in review.score_all(iter(sample_packet))]
+    results = review.score_all(stream(), workers=2)
+    first = next(results)
+    # Two batches of workers * REVIEW_BATCH_CHUNKS * REVIEW_CHUNKSIZE groups at most
+    assert len(pulled) <= 8 < len(sample_packet)
+    assert [first[1]] + [row for _, row, _, _, _ in results] == serial
+
+
+def test_single_group_is_scored_in_process(sample_packet, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("pool started")
+    monkeypatch.setattr(review, "ProcessPoolExecutor", no_pool)
+    assert len(list(review.score_all(iter(sample_packet[:1]), workers=4))) == 1
@@ -0,0 +1,65 @@
+"""--baseline classification and the merge of reviewed rows with the previous report."""
+import csv
+
+import report_delta
+from perform_actual_review import REPORT_FIELDS
+
+
+def row(issue_id, component, dist="9", vendor="Red Hat", date="2026-02-11"):
+    return {"Issue ID": issue_id, "Vendor": vendor, "Dist Version": dist, "Component": component,
+            "Version": "", "Date": date, "Criticality": "Critical", "Patch Description": "old en",
+            "한글 설명": "old ko", "Reference": ""}
+
+
+def quiet(issue_id, component, dist="9"):
+    return report_delta.not_critical_row({'id': issue_id, 'vendor': "Red Hat", 'dist_version': dist,
+                                          'component': component, 'specific_version': "", 'date': "2026-02-01"})
+
+
+def write_report(path, rows):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_baseline_includes_not_critical_groups(tmp_path):
+    path = str(tmp_path / "prev.csv")
+    write_report(path, [row("RHSA-2026:1", "kernel")])
+    report_delta.write_not_critical([quiet("RHSA-2026:2", "openssh")], path)
+    baseline = report_delta.load_baseline(path)
+    assert set(baseline) == {("Red Hat", "kernel"), ("Red Hat", "openssh")}
+    assert not report_delta.is_critical_row(baseline[("Red Hat", "openssh")])
+
+
+def test_merge_rows():
+    baseline = {
+        ("Red Hat", "kernel"): row("RHSA-2026:1", "kernel", dist="8"),
+        ("Red Hat", "glibc"): row("RHSA-2026:3", "glibc"),
+        ("Red Hat", "openssh"): quiet("RHSA-2026:2", "openssh"),
+        ("Red Hat", "bind"): row("RHSA-2026:4", "bind"),
+        ("Red Hat", "sudo"): row("RHSA-2026:5", "sudo"),
+    }
+    fresh = [
+        # Same advisory, now led by a RHEL 9 split: still the same group
+        dict(row("RHSA-2026:1", "kernel"), **{"Patch Description": "new en"}),
+        row("RHSA-2026:9", "glibc"),
+        row("RHSA-2026:7", "curl"),
+    ]
+    reviewed = {report_delta.row_key(r): quiet(r["Issue ID"], r["Component"]) for r in fresh}
+    reviewed[("Red Hat", "openssh")] = quiet("RHSA-2026:8", "openssh")
+    reviewed[("Red Hat", "vim")] = quiet("RHSA-2026:6", "vim")
+    packet_delta = {("Red Hat", "bind"): 'unchanged'}
+
+    merged, statuses, not_critical = report_delta.merge_rows(fresh, reviewed, baseline, packet_delta)
+    assert statuses == {
+        ("Red Hat", "kernel"): 'unchanged', ("Red Hat", "glibc"): 'superseded', ("Red Hat", "curl"): 'new',
+        ("Red Hat", "openssh"): 'unchanged', ("Red Hat", "vim"): 'new', ("Red Hat", "bind"): 'unchanged',
+        ("Red Hat", "sudo"): 'dropped',
+    }
+    by_key = {report_delta.row_key(r): r for r in merged}
+    # Unchanged rows are carried forward verbatim, including edited descriptions
+    assert by_key[("Red Hat", "kernel")]["Patch Description"] == "old en"
+    assert by_key[("Red Hat", "glibc")]["Issue ID"] == "RHSA-2026:9"
+    assert ("Red Hat", "bind") in by_key and ("Red Hat", "sudo") not in by_key
+    assert [r["Issue ID"] for r in not_critical] == ["RHSA-2026:8", "RHSA-2026:6"]
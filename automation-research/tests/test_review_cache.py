@@ -0,0 +1,22 @@
+"""Review cache fingerprints: the reviewer's options, and packet annotation accepting any of them."""
+import perform_actual_review as review
+from review_cache import ReviewCache
+
+
+def test_fingerprint_covers_matching_options():
+    fingerprints = review.review_rules_fingerprints()
+    assert len(set(fingerprints)) == 4
+    assert review.review_rules_fingerprint(False, True) != review.review_rules_fingerprint(False, False)
+
+
+def test_annotation_reads_a_cache_written_with_any_option(tmp_path):
+    path = str(tmp_path / "review_cache.json")
+    cache = ReviewCache(path, review.review_rules_fingerprint(word_boundary=True, dedupe_cves=True))
+    cache.put("RHSA-2026:1", ["text"], ["Mitigates Critical Security vulnerabilities (RCE/PrivEsc)."], [])
+    cache.save()
+
+    annotating = ReviewCache(path, review.review_rules_fingerprints())
+    assert annotating.peek("RHSA-2026:1", ["text"]) is not None
+    # A plain reviewer run does not reuse verdicts scored with other options
+    assert ReviewCache(path, review.review_rules_fingerprint()).peek("RHSA-2026:1", ["text"]) is None
+    assert ReviewCache(path, ["stale keyword table"]).peek("RHSA-2026:1", ["text"]) is None
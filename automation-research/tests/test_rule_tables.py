@@ -0,0 +1,51 @@
+"""Ingest (EXCLUSION_RULES) and pruning (PRUNE_RULES) rule tables."""
+import pytest
+
+import patch_preprocessing as pre
+
+
+@pytest.mark.parametrize("vendor, component, expected", [
+    ("Oracle", "kernel-uek-v5.15-ol9", None),
+    ("Oracle", "glibc", "oracle_non_uek"),
+    ("Red Hat", "firefox", "explicit_blacklist"),
+    ("Red Hat", "vim-enhanced", "explicit_blacklist"),
+    ("Red Hat", "htop", "whitelist_miss"),
+    ("Ubuntu", "python-urllib3-compat", "explicit_blacklist"),
+    ("Red Hat", "openssl", None),
+    ("Red Hat", "qemu-kvm-core", None),
+    ("Ubuntu", "linux-kernel-hwe", None),
+    ("Red Hat", "texlive-kernel", "whitelist_miss"),
+])
+def test_prune_by_component(vendor, component, expected):
+    assert pre.prune_rule(vendor, component, "") == expected
+
+
+def test_full_text_is_read_only_when_components_do_not_decide():
+    reads = []
+    def text():
+        reads.append(1)
+        return "This update for package glibc fixes ..."
+    assert pre.prune_rule("Red Hat", "openssl", text) is None
+    assert reads == []
+    assert pre.prune_rule("Red Hat", "compat-libs", text) is None
+    assert reads == [1]
+
+
+@pytest.mark.parametrize("vendor, title, summary, text, expected", [
+    ("Red Hat", "Red Hat OpenShift Container Platform 4.16", "", "x" * 60, "openshift"),
+    ("Red Hat", "RHEL 7 kernel update", "", "x" * 60, "rhel7"),
+    ("Ubuntu", "RHEL 7 kernel update", "", "linux - linux kernel", None),
+    ("Red Hat", "openssl update", "", "too short", "garbage"),
+    ("Ubuntu", "Linux kernel (AWS) vulnerabilities", "", "linux-aws - Linux kernel for AWS", "ubuntu_variant_kernel"),
+    ("Ubuntu", "Linux kernel vulnerabilities", "", "Packages linux - Linux kernel", None),
+    ("Red Hat", "glibc update", "Update Services for SAP Solutions", "x" * 60, "sap"),
+    ("Red Hat", "kernel-rt security update", "", "x" * 60, "kernel_rt"),
+    ("Red Hat", "glibc security update", "", "x" * 60, None),
+])
+def test_exclusion_rules(vendor, title, summary, text, expected):
+    assert pre.exclusion_rule(vendor, "RHSA-2026:1", title, summary, text) == expected
+
+
+def test_unknown_op_is_rejected():
+    with pytest.raises(ValueError):
+        pre.compile_rules([("bad", "exclude", None, [("title", "startswith", "x")])])
@@ -0,0 +1,36 @@
+"""RunReport stage measurements and output formats."""
+import sys
+
+import pytest
+
+from run_report import RunReport, reset_peak_rss
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux") or not reset_peak_rss(),
+                    reason="per-stage peak RSS needs /proc/self/clear_refs")
+def test_stage_peak_is_per_stage():
+    report = RunReport("test")
+    with report.stage("big"):
+        block = bytearray(64 * 1024 * 1024)
+        block[::4096] = b"x" * len(block[::4096])  # touch every page
+        del block
+    with report.stage("small"):
+        pass
+    big, small = report.stages["big"], report.stages["small"]
+    assert big["peak_rss_bytes"] - small["peak_rss_bytes"] > 48 * 1024 * 1024
+    # The run's peak does not drop when a later stage is smaller
+    assert small["process_peak_rss_bytes"] >= big["peak_rss_bytes"]
+
+
+def test_counters_and_prometheus():
+    report = RunReport("test")
+    with report.stage("ingest"):
+        report.count("excluded_advisories", rule="openshift")
+        report.count("excluded_advisories", 2, rule="sap")
+    report.observe_item("a.json", 0.5, 123)
+    data = report.to_dict()
+    assert {"name": "excluded_advisories", "labels": {"rule": "sap"}, "value": 2} in data["counters"]
+    assert data["slowest_items"] == [{"id": "a.json", "seconds": 0.5, "size_bytes": 123}]
+    text = report.to_prometheus()
+    assert 'prb_excluded_advisories_total{script="test",rule="openshift"} 1' in text
+    assert 'prb_stage_seconds{script="test",stage="ingest"}' in text
@@ -0,0 +1,45 @@
+"""--token-budget shard writer and its manifest."""
+import os
+import json
+
+import patch_preprocessing as pre
+from patch_record import Patch
+from perform_actual_review import iter_packet
+
+
+def candidates(sample_packet):
+    return [Patch.from_dict(item) for item in sample_packet]
+
+
+def test_shards_respect_budget_and_order(tmp_path, sample_packet):
+    path = str(tmp_path / "patches_for_llm_review.json")
+    cands = candidates(sample_packet)
+    budget = max(pre.estimate_tokens(c) for c in cands) * 2
+    assert pre.write_shards(iter(cands), path, budget) == len(cands)
+
+    manifest = json.loads((tmp_path / "patches_for_llm_review.shards.json").read_text())
+    assert len(manifest["shards"]) > 1
+    for shard in manifest["shards"]:
+        assert shard["estimated_tokens"] <= budget
+        assert os.path.exists(tmp_path / shard["path"])
+    ids = [cid for shard in manifest["shards"] for cid in shard["candidates"]]
+    assert ids == [c.id for c in cands]
+    assert [item["id"] for item in iter_packet(pre.shard_manifest_path(path))] == ids
+
+
+def test_stale_outputs_are_removed(tmp_path, sample_packet):
+    path = str(tmp_path / "patches_for_llm_review.json")
+    pre.write_packet(iter(candidates(sample_packet)), path)
+    budget = max(pre.estimate_tokens(c) for c in candidates(sample_packet)) * 2
+    pre.write_shards(iter(candidates(sample_packet)), path, budget)
+    assert not os.path.exists(path)
+    first = sorted(os.listdir(tmp_path))
+
+    # A run with a larger budget writes fewer shards and drops the extra ones
+    pre.write_shards(iter(candidates(sample_packet)), path, budget * 100)
+    assert sorted(os.listdir(tmp_path)) == ["patches_for_llm_review.001.json", "patches_for_llm_review.shards.json"]
+    assert len(first) > 2
+
+    # A single-packet run drops the shards and manifest
+    pre.write_output({}, None, path)
+    assert os.listdir(tmp_path) == ["patches_for_llm_review.json"]
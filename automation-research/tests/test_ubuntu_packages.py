@@ -0,0 +1,36 @@
+"""USN package table index used for Ubuntu dist-version splits."""
+import patch_preprocessing as pre
+
+USN = (" Ubuntu Security Notices USN-7047-1 USN-7047-1: libvirt vulnerabilities Publication date 8 January 2026 "
+       "Overview Several security issues were fixed in libvirt. Releases 25.10 24.04 LTS 22.04 LTS "
+       "Open side navigation Packages libvirt - Libvirt virtualization toolkit Details It was discovered that "
+       "libvirt parsed user-provided XML files before performing ACL checks. (CVE-2025-12748) "
+       "Update instructions The problem can be corrected by updating your system to the following package "
+       "versions: Ubuntu Release Package Version "
+       "25.10 questing libvirt-daemon – 11.6.0-1ubuntu3.2 libvirt0 – 11.6.0-1ubuntu3.2 "
+       "24.04 LTS noble libvirt-daemon – 10.0.0-2ubuntu8.11 libvirt0 – 10.0.0-2ubuntu8.11 runc – 1.3.3-0ubuntu1~24.04.3 "
+       "22.04 LTS jammy intel-microcode – 3.20250812.0ubuntu0.22.04.1 libc6 – 2.35-0ubuntu3.11 "
+       "Reduce your security exposure Ubuntu Pro provides ten-year security coverage References CVE-2025-12748")
+
+
+def index():
+    return pre.ubuntu_package_index(pre.tokenize_advisory("Ubuntu", USN))
+
+
+def test_index_reads_only_the_package_table():
+    idx = index()
+    assert idx[("24.04 LTS", "runc")] == "1.3.3-0ubuntu1~24.04.3"
+    assert idx[("25.10", "libvirt0")] == "11.6.0-1ubuntu3.2"
+    # "Packages libvirt - Libvirt virtualization toolkit" in the header is not a version
+    assert all(version[0].isdigit() for version in idx.values())
+
+
+def test_version_lookup():
+    idx = index()
+    assert pre.ubuntu_package_version(idx, "24.04 LTS", "runc") == "1.3.3-0ubuntu1~24.04.3"
+    # No row of its own: the first binary package named after the component
+    assert pre.ubuntu_package_version(idx, "24.04 LTS", "libvirt") == "10.0.0-2ubuntu8.11"
+    assert pre.ubuntu_package_version(idx, "22.04 LTS", "microcode") == "3.20250812.0ubuntu0.22.04.1"
+    # Not listed for that release, and glibc only ships as libc6
+    assert pre.ubuntu_package_version(idx, "22.04 LTS", "runc") is None
+    assert pre.ubuntu_package_version(idx, "22.04 LTS", "glibc") is None
@@ -0,0 +1,41 @@
+"""Oracle UEK changelog parsing and cross-erratum dedupe."""
+import patch_preprocessing as pre
+
+CHANGELOG = """[5.15.0-316.196.4.1]
+- tipc: Fix use-after-free in tipc_mon_reinit_self(). (Kuniyuki Iwashima)  [Orabug: 38788585]  {CVE-2025-40280}
+- mptcp: pm: fix race (Matthieu Baerts (NGI0))  [Orabug: 1, 2]  [Orabug: 3]  {CVE-2025-38001, CVE-2025-38002}
+
+[5.15.0-316.196.4]
+- vhost: allow userspace to create workers (Mike Christie)  [Orabug: 38545946]"""
+
+
+def test_parse_entries():
+    entries = pre.parse_uek_changelog(CHANGELOG)
+    assert [(e.version, e.subject, e.author) for e in entries] == [
+        ("5.15.0-316.196.4.1", "tipc: Fix use-after-free in tipc_mon_reinit_self().", "Kuniyuki Iwashima"),
+        ("5.15.0-316.196.4.1", "mptcp: pm: fix race", "Matthieu Baerts (NGI0)"),
+        ("5.15.0-316.196.4", "vhost: allow userspace to create workers", "Mike Christie"),
+    ]
+    assert entries[0].orabugs == ["38788585"] and entries[0].cves == ["CVE-2025-40280"]
+    assert entries[1].orabugs == ["1", "2", "3"] and entries[1].cves == ["CVE-2025-38001", "CVE-2025-38002"]
+
+
+def test_dedupe_against_newer_erratum():
+    # The newer erratum already lists the vhost fix, under another version and Orabug
+    seen = {("vhost: allow userspace to create workers", "Mike Christie")}
+    text, dropped = pre.dedupe_uek_changelog(CHANGELOG, seen)
+    assert dropped == 1
+    # The version header left without entries goes too
+    assert "[5.15.0-316.196.4]\n" not in text + "\n"
+    assert text.startswith("[5.15.0-316.196.4.1]\n- tipc:")
+    assert ("mptcp: pm: fix race", "Matthieu Baerts (NGI0)") in seen
+
+
+def test_dedupe_within_text_and_glued_tail():
+    text = ("[5.4.17-1]\n- a: fix (X)  [Orabug: 1]\n- a: fix (X)  [Orabug: 1]  "
+            "Oracle Linux 8 Description of changes: [5.4.17-0]\n- b: fix (Y)")
+    out, dropped = pre.dedupe_uek_changelog(text)
+    assert dropped == 1
+    assert out.count("- a: fix (X)") == 1
+    assert "Oracle Linux 8 Description of changes: [5.4.17-0]" in out
+    assert out.endswith("- b: fix (Y)")
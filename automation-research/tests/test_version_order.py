@@ -0,0 +1,50 @@
+"""EVR comparison and the latest-first order of a group (sort_group)."""
+import pytest
+
+import patch_preprocessing as pre
+from patch_record import Patch
+
+
+@pytest.mark.parametrize("older, newer", [
+    ("5.14.0-427.13.1.el9_4", "5.14.0-427.42.1.el9_4"),
+    ("5.15.0-9.el9uek", "5.15.0-10.el9uek"),  # numeric, not lexical
+    ("1.0~rc1-1", "1.0-1"),
+    ("1.0-1", "1.0^git1-1"),
+    ("1.0-1", "1.0a-1"),
+    ("9.9-1", "1:1.0-1"),  # epoch wins
+    ("openssl-3.0.7-24.el9", "openssl-3.0.7-27.el9"),
+])
+def test_evr_key(older, newer):
+    assert pre.evr_key(older) < pre.evr_key(newer)
+
+
+def patch(pid, dist, date, version):
+    return Patch(pid, pid, "Ubuntu", dist, date, "kernel", version)
+
+
+def test_versions_only_compared_within_a_dist_version():
+    group = [
+        patch("USN-1-24.04", "24.04 LTS", "2025-12-07", "6.8.0-50.51"),
+        patch("USN-2", "22.04 LTS", "2026-01-15", "5.15.0-130.140"),
+        patch("USN-3-22.04", "22.04 LTS", "2025-11-02", "5.15.0-120.130"),
+    ]
+    pre.sort_group(group)
+    # 6.8 > 5.15 says nothing about which release was patched last
+    assert [p.id for p in group] == ["USN-2", "USN-1-24.04", "USN-3-22.04"]
+
+
+def test_evr_orders_one_dist_version():
+    group = [
+        patch("RHSA-2026:3", "9", "2026-02", "5.14.0-427.13.1.el9_4"),
+        patch("RHSA-2026:1", "9", "2026-02", "5.14.0-427.42.1.el9_4"),
+        patch("RHSA-2026:2", "8", "2026-03", "4.18.0-553.5.1.el8_10"),
+    ]
+    pre.sort_group(group)
+    assert [p.id for p in group] == ["RHSA-2026:2", "RHSA-2026:1", "RHSA-2026:3"]
+
+
+def test_date_then_natural_id_without_versions():
+    group = [patch("USN-999-1", "", "2026-01-15", ""), patch("USN-1000-1", "", "2026-01-15", ""),
+             patch("USN-5-1", "", "2026-02-01", "")]
+    pre.sort_group(group)
+    assert [p.id for p in group] == ["USN-5-1", "USN-1000-1", "USN-999-1"]